@@ -6,18 +6,21 @@
 #   Takes a text, extracts the kanji & 
 #   Outputs a word list with links to
 #   a chosen dictionary resource.
-#   
+#   glossary() and glossary_md() do the work
+#   without the gui, for the command line see
+#   ks_cli.py.
 #
 # -----------------------------------------#
 
 import sys
 import re
-import dialogs
 import time
-import sqlite3
+import ks_db
+import ks_orphans
 import os
 import csv
 from pathlib import Path
+from ks_paths import unique_path
 
 
 # decoration snippets
@@ -28,54 +31,10 @@ _line2_ = ""
 kanji = r'[㐀-䶵一-鿋豈-頻]'
 
 
-def add_unique_postfix(fn):
-    if not os.path.exists(fn):
-        return fn
-
-    path, name = os.path.split(fn)
-    name, ext = os.path.splitext(name)
-
-    make_fn = lambda i: os.path.join(path, f"{name}_{i}{ext}")
-
-    for i in range(2, sys.maxsize):
-        uni_fn = make_fn(i)
-        if not os.path.exists(uni_fn):
-            return uni_fn
-
-    return None
-
-
-def main():
-    
-    # select file to sieve
-    filepath = dialogs.pick_document(
-        types=["public.utf8-plain-text", "public.text"])
-    if filepath is None:
-        dialogs.alert("⚠️ Alert",
-                      "No file found, script cancelled",
-                      "OK",
-                      hide_cancel_button=True)
-        print("user cancelled")
-        sys.exit("user cancelled")
-    #_file = open(filepath, "r", encoding="utf-8")
-    #text = _file.read()
-    #_file.close()
-            
-    # choose a dictionary
-    choice = dialogs.list_dialog(
-        title='Choose a dictionary for links',
-        items=["reikoku", "weblio", "jisho", "eijiro", "wiktionary"],
-        multiple=False)
-    if choice is None:
-        dialogs.alert(
-            "⚠️ Alert",
-            "No dictionary selected, script cancelled.",
-            "OK", hide_cancel_button=True)
-        print("user cancelled")
-        sys.exit("user cancelled")
-        
+def url_scheme(choice):
+    ''' (prefix, postfix) for dictionary links '''
     url_scheme_postfix = ""
-
+    url_scheme = ""
     if choice == "weblio":
         url_scheme = "https://ejje.weblio.jp/content/"
     elif choice == "eijiro":
@@ -87,42 +46,37 @@ def main():
     elif choice == "wiktionary":
         url_scheme = "https://en.m.wiktionary.org/wiki/"
         url_scheme_postfix = "#Japanese"
+    return url_scheme, url_scheme_postfix
 
-    print(choice + " chosen ...")
-    
-    print("searching corelist...")
-    
-    # word list 
-    wordlist = []
-    with open(filepath, encoding = 'utf-8', newline='\n') as text2:
-        input = csv.reader(text2)
-        for row in input:
-            wordlist = wordlist + [row[0]]
 
+def read_wordlist(lines):
+    ''' the first column of each line, csv or one word per line '''
+    return [row[0] for row in csv.reader(lines) if row]
+
+
+def glossary(wordlist, progress=None):
+    ''' core -> user -> jmdict, each searches what the last left,
+        entries and remaining words keep the list's order '''
+    progress = progress or (lambda message: None)
+    progress("searching corelist...")
     # search corelist
-    connection = sqlite3.connect("data/dict.db")
-    cursor = connection.cursor()
-    core_output = ""
+    cursor = ks_db.lexicon()
+    core_entries = []
     core_omitted_words = []
-
     for target in wordlist:
         definition = cursor.execute(
             """SELECT core.kanji, core.kana, core.pos, core.eng
                FROM core WHERE core.kanji = ? """,
             (target,), ).fetchone()
         if definition is not None:
-            core_output += ("[" + str(definition[0]) + "]"
-                            + "(" + url_scheme + str(definition[0])
-                            + url_scheme_postfix + ") : "
-                            + "【" + str(definition[1]) + "】,"
-                            + " (" + str(definition[2]) + "), "
-                            + str(definition[3]) + "  \n")
+            core_entries.append(definition)
         else:
             core_omitted_words += [target]
-    
-    print("searching sieve list...")
+
+    progress("searching sieve list...")
     # search user list
-    sieve_output = ""
+    cursor = ks_db.reader()
+    sieve_entries = []
     sieve_omitted_words = []
     # search for kanji & kana
     for target in core_omitted_words:
@@ -131,152 +85,196 @@ def main():
                FROM user WHERE user.kanji = ? """,
             (target,),).fetchone()
         if definition is not None:
-            sieve_output += ("[" + str(definition[0]) + "]"
-                               + "(" + url_scheme + str(definition[0])
-                               + url_scheme_postfix + ") :"
-                               + "【" + str(definition[1]) + "】,"
-                               + " (" + str(definition[2]) + "), "
-                               + str(definition[3]) + ", "
-                               + str(definition[4]) + "  \n")
+            sieve_entries.append(definition)
         else:
             sieve_omitted_words += [target]
 
-    
-    print("searching jmdict for kanji...")
+    progress("searching jmdict for kanji...")
     # search jmdict for kanji
-    connection = sqlite3.connect("data/dict.db")
-    cursor = connection.cursor()
-    
-    jmdict_output = ""
+    cursor = ks_db.lexicon()
+    jmdict_entries = []
     jm_omitted_words = []
-    
     for target in sieve_omitted_words:
         definition = cursor.execute(
-            """SELECT words_jp.kanji, words_jp.reading, 
-            words_jp.tags, words_en.def FROM words_jp  
+            """SELECT words_jp.kanji, words_jp.reading,
+            words_jp.tags, words_en.def FROM words_jp
             INNER JOIN words_en ON words_jp.ID=words_en.JPID
             WHERE words_jp.kanji = ? """,
             (target,), ).fetchone()
         if definition is not None:
-            jmdict_output += ("[" + str(definition[0]) + "]"
-                              + "(" + url_scheme + str(definition[0])
-                              + url_scheme_postfix + ") : "
-                              + "【" + str(definition[1]) + "】,"
-                              + " (" + str(definition[2]) + "), "
-                              + str(definition[3]) + "  \n")
+            jmdict_entries.append(definition)
         else:
             jm_omitted_words += [target]
-    
-    print("searching jmdict for kana...")
+
+    progress("searching jmdict for kana...")
     #search for kana in jmdict
     jm_omitted_words_2 = []
-    for target in jm_omitted_words: 
+    for target in jm_omitted_words:
         definition = cursor.execute(
             """SELECT words_jp.kanji, words_jp.reading,
-            words_jp.tags, words_en.def FROM words_jp  
-            INNER JOIN words_en ON words_jp.ID=words_en.JPID 
+            words_jp.tags, words_en.def FROM words_jp
+            INNER JOIN words_en ON words_jp.ID=words_en.JPID
             WHERE words_jp.reading = ? """,
             (target,),).fetchone()
         if definition is not None:
-            jmdict_output += ("[" + str(definition[0]) + "]"
-                              + "(" + url_scheme + str(definition[0])
-                              + url_scheme_postfix + ") : "
-                              + "【" + str(definition[1]) + "】,"
-                              + " (" + str(definition[2]) + "), "
-                              + str(definition[3]) + "  \n")
+            jmdict_entries.append(definition)
         else:
             jm_omitted_words_2 += [target]
-    
-    connection.commit()
-    connection.close()   
 
-    
+    return {"core": {"entries": core_entries,
+                     "remaining": core_omitted_words},
+            "user": {"entries": sieve_entries,
+                     "remaining": sieve_omitted_words},
+            "jmdict": {"entries": jmdict_entries,
+                       "remaining": jm_omitted_words_2},
+            "orphans": jm_omitted_words_2}
+
+
+def entry_md(definition, scheme, user=False):
+    url_scheme, url_scheme_postfix = scheme
+    if user:
+        return ("[" + str(definition[0]) + "]"
+                + "(" + url_scheme + str(definition[0])
+                + url_scheme_postfix + ") :"
+                + "【" + str(definition[1]) + "】,"
+                + " (" + str(definition[2]) + "), "
+                + str(definition[3]) + ", "
+                + str(definition[4]) + "  \n")
+    return ("[" + str(definition[0]) + "]"
+            + "(" + url_scheme + str(definition[0])
+            + url_scheme_postfix + ") : "
+            + "【" + str(definition[1]) + "】,"
+            + " (" + str(definition[2]) + "), "
+            + str(definition[3]) + "  \n")
+
+
+def orphan_md(words, scheme):
     orphan = ""
-    for word in jm_omitted_words_2:
+    for word in words:
         orphan = (orphan + "[" + word + "]"
-                  + "(" + url_scheme + word + ") :  \n")
-    
-    print("formatting ... \n\n")
-    
-    # prettify text
-    # list of tuples [(x,y)] to string x(y)
-    def pretty(text):
-        text = " ".join(map(str, text))
-        text = text.replace("(", "").replace(", ", "(").replace("'", "")
-        return text
-    
-    sieve_omitted_wordsp = str(sieve_omitted_words).replace("[", "").replace(
-        "'", "").replace("]", "")
-    jm_omitted_words_2p = str(jm_omitted_words_2).replace("[", "").replace(
-        "'", "").replace("]", "")
-    core_omitted_wordsp = str(core_omitted_words).replace("[", "").replace(
+                  + "(" + scheme[0] + word + ") :  \n")
+    return orphan
+
+
+def plain(words):
+    return str(words).replace("[", "").replace(
         "'", "").replace("]", "")
-    
-    # output to console
-    print(_line_)
-    print("core 6k list:  \n")
-    print(core_output)
-    print("omitted:", len(core_omitted_words), "\n")
-    print(core_omitted_wordsp)
-    print(_line_)
-    print("sieve list:  \n")
-    print(sieve_output)
-    print("omitted:", len(sieve_omitted_words), "\n")
-    print(sieve_omitted_wordsp)
-    print(_line_)
-    print("jmdict:  \n")
-    print(jmdict_output)
-    print("omitted:", len(jm_omitted_words_2), "\n")
-    print(jm_omitted_words_2p)
-    print(_line_)
-    print(orphan)
-    print("\n\nSaving to file ... \n\n")
-    
-    # text for output #
-    sieved_text = f'''
+
+
+def glossary_md(found, choice):
+    ''' the glossary as markdown, without the title '''
+    scheme = url_scheme(choice)
+    core_output = "".join(entry_md(e, scheme)
+                          for e in found["core"]["entries"])
+    sieve_output = "".join(entry_md(e, scheme, user=True)
+                           for e in found["user"]["entries"])
+    jmdict_output = "".join(entry_md(e, scheme)
+                            for e in found["jmdict"]["entries"])
+    core_omitted_words = found["core"]["remaining"]
+    sieve_omitted_words = found["user"]["remaining"]
+    jm_omitted_words_2 = found["jmdict"]["remaining"]
+    orphan = orphan_md(found["orphans"], scheme)
+    return f'''
 __Glossary:__  \n
 {_line2_}
 __Core 6k list:__  \n\n
 {core_output} \n
 __omitted words:__ {len(core_omitted_words)}  \n
-{core_omitted_wordsp}
+{plain(core_omitted_words)}
 {_line_}
 __sieve list:__  \n
 {sieve_output} \n
 __omitted words:__ {len(sieve_omitted_words)}  \n
-{sieve_omitted_wordsp}
+{plain(sieve_omitted_words)}
 {_line_}
 __jmdict list:__  \n
 {jmdict_output} \n
 __omitted words:__  {len(jm_omitted_words_2)}  \n
-{jm_omitted_words_2p}  \n
+{plain(jm_omitted_words_2)}  \n
 {_line_}
 {orphan}  \n
 '''
 
+
+def main():
+    import dialogs
+
+    # select file to sieve
+    filepath = dialogs.pick_document(
+        types=["public.utf8-plain-text", "public.text"])
+    if filepath is None:
+        dialogs.alert("⚠️ Alert",
+                      "No file found, script cancelled",
+                      "OK",
+                      hide_cancel_button=True)
+        print("user cancelled")
+        sys.exit("user cancelled")
+
+    # choose a dictionary
+    choice = dialogs.list_dialog(
+        title='Choose a dictionary for links',
+        items=["reikoku", "weblio", "jisho", "eijiro", "wiktionary"],
+        multiple=False)
+    if choice is None:
+        dialogs.alert(
+            "⚠️ Alert",
+            "No dictionary selected, script cancelled.",
+            "OK", hide_cancel_button=True)
+        print("user cancelled")
+        sys.exit("user cancelled")
+
+    print(choice + " chosen ...")
+
+    # word list
+    with open(filepath, encoding = 'utf-8', newline='\n') as text2:
+        wordlist = read_wordlist(text2)
+
+    found = glossary(wordlist, print)
+    scheme = url_scheme(choice)
+    orphan = orphan_md(found["orphans"], scheme)
+
+    print("formatting ... \n\n")
+
+    # output to console
+    for label, tier, user in (("core 6k list:", "core", False),
+                              ("sieve list:", "user", True),
+                              ("jmdict:", "jmdict", False)):
+        print(_line_)
+        print(label + "  \n")
+        print("".join(entry_md(e, scheme, user)
+                      for e in found[tier]["entries"]))
+        print("omitted:", len(found[tier]["remaining"]), "\n")
+        print(plain(found[tier]["remaining"]))
+    print(_line_)
+    print(orphan)
+    print("\n\nSaving to file ... \n\n")
+
+    # text for output #
+    sieved_text = glossary_md(found, choice)
+
     # save output #
     newdir = "glossary output/"
     newfile = Path(newdir)
     if not newfile.is_dir(): os.mkdir(newdir)
     newname = Path(filepath).stem + "_" + choice + "_s.md"
-    newpath = "glossary output/" + newname
     newfile = Path(newdir + newname)
-    newpath = add_unique_postfix(newfile)
+    newpath = unique_path(newfile)
     newtext = (Path(filepath).stem
                 + "  \n_" + time.ctime()
                 + "_  \n\n" + sieved_text)
     newfile = open(newpath, "w", encoding="utf-8")
     newfile.write(newtext)
     newfile.close()
-    
+
     # append to orphans file
-    newfile = open("glossary output/orphans.md", "a", encoding="utf-8")
-    newfile.write("\n\n" + newname + "  \n" + time.ctime() + "  \n" + orphan)
-    newfile.close()
+    ks_orphans.append_log("glossary output/orphans.md",
+                          "\n\n" + newname + "  \n" + time.ctime() + "  \n"
+                          + orphan)
+    ks_orphans.record(found["orphans"], Path(filepath).stem)
 
     print("saved \n")
-    
-    
+
+
 if __name__ == '__main__':
     main()
     
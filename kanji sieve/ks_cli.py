@@ -0,0 +1,152 @@
+# -----------------------------------------#
+#   ks_cli for Kanji Sieve 1.18
+#   2026-10-19
+#   (c)Robert Belton BSD 3-Clause License
+#
+#
+#   The three tools for the command line,
+#   reading stdin (or a file) and writing
+#   stdout, no gui and no files in between:
+#      kanji-sieve        text -> report
+#      remove-furigana    ocr text -> text
+#      generate-glossary  word list -> glossary
+#   so they chain in a pipe:
+#      ocr | remove-furigana | kanji-sieve --json
+#
+#   usage:
+#      python ks_cli.py <tool> [options] [file]
+#   or link the script under a tool's name
+#      ln -s "$PWD/ks_cli.py" ~/bin/kanji-sieve
+#   and run that. The data folder is the one
+#   in the working directory, or else the one
+#   next to this script.
+#
+#   kanji-sieve writes the markdown report, or
+#   --json the analysis, --html the html page,
+#   --tsv the flashcards. Prefs come from
+#   data/kanji_sieve.pref, --dict and --order
+#   override them. Nothing is saved.
+#   --furigana takes ocr text with its
+#   furigana lines: they are stripped and
+#   their readings looked up first.
+#
+# -----------------------------------------#
+
+import os
+import sys
+import json
+import argparse
+
+HERE = os.path.dirname(os.path.realpath(__file__))
+TOOLS = ("kanji-sieve", "remove-furigana", "generate-glossary")
+
+
+def read_input(path):
+    if path in (None, "-"):
+        return sys.stdin.read()
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def write_json(obj):
+    json.dump(obj, sys.stdout, ensure_ascii=False)
+    sys.stdout.write("\n")
+
+
+# ------------------------------------------------------------------ tools
+def kanji_sieve(args, text):
+    from ks_engine import (read_prefs, sieve_text, render_md, flashcards,
+                           result_json)
+    prefs = read_prefs()
+    if args.dict:
+        prefs["dict"] = args.dict
+    if args.order:
+        prefs["order"] = args.order
+    readings = None
+    if args.furigana:
+        from remove_furigana import harvest_furigana
+        text, readings = harvest_furigana(text)
+    result = sieve_text(text, prefs, name=args.name, readings=readings)
+    if args.format == "json":
+        write_json(result_json(result))
+    elif args.format == "html":
+        from ks_html import write_html
+        write_html(result, prefs, sys.stdout)
+    elif args.format == "tsv":
+        sys.stdout.write(flashcards(result))
+    else:
+        sys.stdout.write(render_md(result, prefs))
+
+
+def remove_furigana(args, text):
+    from remove_furigana import strip_furigana
+    new_text = strip_furigana(text)
+    if args.format == "json":
+        write_json({"text": new_text})
+    else:
+        sys.stdout.write(new_text)
+
+
+def generate_glossary(args, text):
+    from generate_glossary import read_wordlist, glossary, glossary_md
+    found = glossary(read_wordlist(text.splitlines()))
+    if args.format == "json":
+        write_json(found)
+    else:
+        sys.stdout.write(glossary_md(found, args.dict or "weblio"))
+
+
+def parser(tool=None):
+    p = argparse.ArgumentParser(
+        prog=tool, description="Kanji Sieve tools for pipes.")
+    if tool is None:
+        p.add_argument("tool", choices=TOOLS)
+    p.add_argument("file", nargs="?", help="input file, stdin if left out")
+    p.add_argument("--json", dest="format", action="store_const",
+                   const="json", default="md", help="write json")
+    p.add_argument("--html", dest="format", action="store_const",
+                   const="html", help="kanji-sieve: write the html report")
+    p.add_argument("--tsv", dest="format", action="store_const",
+                   const="tsv", help="kanji-sieve: write the flashcards")
+    p.add_argument("--dict", help="dictionary for links, eg. weblio")
+    p.add_argument("--order", choices=("text", "frequency", "grade"),
+                   help="kanji-sieve: order of the word lists")
+    p.add_argument("--name", default="", help="kanji-sieve: report name")
+    p.add_argument("--furigana", action="store_true",
+                   help="kanji-sieve: the text still has its furigana, "
+                        "strip it and use its readings")
+    return p
+
+
+def main(argv=None):
+    argv = sys.argv if argv is None else argv
+    tool = os.path.splitext(os.path.basename(argv[0]))[0]
+    tool = tool if tool in TOOLS else None
+    args = parser(tool).parse_intermixed_args(argv[1:])
+    tool = tool or args.tool
+    for stream in (sys.stdin, sys.stdout):
+        stream.reconfigure(encoding="utf-8")
+    try:
+        text = read_input(args.file)
+    except OSError as e:
+        sys.exit(tool + ": " + str(e))
+    # data/ and the tool modules live next to this script
+    if not os.path.isdir("data"):
+        os.chdir(HERE)
+    if HERE not in sys.path:
+        sys.path.insert(0, HERE)
+    run = {"kanji-sieve": kanji_sieve,
+           "remove-furigana": remove_furigana,
+           "generate-glossary": generate_glossary}[tool]
+    try:
+        run(args, text)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # the reader went away, eg. | head
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    except (OSError, ValueError) as e:
+        sys.exit(tool + ": " + str(e))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+# -----------------------------------------#
+#   ks_compact for Kanji Sieve 1.18
+#   2026-10-19
+#   (c)Robert Belton BSD 3-Clause License
+#
+#
+#   Rewrites dict.db smaller:
+#      pos and tags      each distinct value
+#                        once, rows keep its
+#                        integer id
+#      defs              each distinct
+#                        definition once, core
+#                        and jmdict share it
+#      core_keyed        the old rowids, and
+#      jp_keyed          indexes on the lookup
+#                        columns, so rows come
+#                        back in the same order
+#                        and a missing kanji is
+#                        still NULL
+#      en_keyed          a WITHOUT ROWID table
+#                        keyed on the jmdict id
+#                        and the old rowid, so a
+#                        word's definitions are
+#                        one b-tree search
+#   Views named core, words_jp and words_en
+#   give the old columns, so every query
+#   works unchanged. The user table is copied
+#   as it is.
+#   The sizes, zipped sizes and lookup times
+#   of both are reported.
+#
+#   usage (from the kanji sieve folder, with
+#   kanji sieve closed):
+#      python ks_compact.py [--zip] [--install]
+#   --zip      also writes dict.compact.zip (with
+#              dict.sha256 in it) and its .sha256,
+#              to ship as dict.zip
+#   --install  puts the compacted db in place
+#              of dict.db (kept as dict.db.orig)
+#
+#   requires:
+#      data/dict.db
+#
+#   will build:
+#      data/dict.compact.db
+#
+# -----------------------------------------#
+
+import os
+import sys
+import time
+import zlib
+import sqlite3
+import hashlib
+from ks_data import DICT_DB
+from ks_db import _uri
+from ks_engine import CORE_SQL, JMDICT_SQL
+
+COMPACT_DB = "data/dict.compact.db"
+SAMPLE = 2000  # terms timed for the report
+
+SCHEMA = """
+CREATE TABLE pos(id INTEGER PRIMARY KEY, pos TEXT);
+CREATE TABLE tags(id INTEGER PRIMARY KEY, tags TEXT);
+CREATE TABLE defs(id INTEGER PRIMARY KEY, def TEXT);
+CREATE TABLE core_keyed(
+    seq INTEGER PRIMARY KEY, kanji TEXT, kana TEXT,
+    pos_id INTEGER NOT NULL, eng_id INTEGER NOT NULL);
+CREATE TABLE jp_keyed(
+    seq INTEGER PRIMARY KEY, kanji TEXT, id INTEGER, reading TEXT,
+    tags_id INTEGER NOT NULL);
+CREATE TABLE en_keyed(
+    jpid INTEGER NOT NULL, seq INTEGER NOT NULL, def_id INTEGER NOT NULL,
+    PRIMARY KEY(jpid, seq)) WITHOUT ROWID;
+CREATE INDEX core_kanji ON core_keyed(kanji);
+CREATE INDEX jp_kanji ON jp_keyed(kanji);
+CREATE INDEX jp_reading ON jp_keyed(reading);
+
+CREATE VIEW core AS
+    SELECT c.kanji AS kanji, c.kana AS kana, pos.pos AS pos, defs.def AS eng
+    FROM core_keyed AS c
+    JOIN pos ON pos.id = c.pos_id JOIN defs ON defs.id = c.eng_id;
+CREATE VIEW words_jp AS
+    SELECT j.id AS ID, j.kanji AS kanji, j.reading AS reading,
+           tags.tags AS tags
+    FROM jp_keyed AS j JOIN tags ON tags.id = j.tags_id;
+CREATE VIEW words_en AS
+    SELECT e.jpid AS JPID, defs.def AS def
+    FROM en_keyed AS e JOIN defs ON defs.id = e.def_id;
+"""
+
+
+class _Ids(dict):
+    ''' value -> small integer id, new values get the next one '''
+
+    def __missing__(self, value):
+        self[value] = len(self)
+        return self[value]
+
+
+def compact(src=DICT_DB, out=COMPACT_DB):
+    ''' write the compacted copy of src to out '''
+    old = sqlite3.connect(_uri(src, mode="ro"), uri=True)
+    if old.execute("""SELECT 1 FROM sqlite_master
+                      WHERE type = 'table' AND name = 'defs'""").fetchone():
+        old.close()
+        raise ValueError(src + " is already compacted")
+    if os.path.exists(out):
+        os.remove(out)
+    con = sqlite3.connect(out, isolation_level=None)
+    con.execute("PRAGMA journal_mode=OFF")
+    con.execute("PRAGMA synchronous=OFF")
+    con.execute("BEGIN")
+    for sql in SCHEMA.split(";"):
+        if sql.strip():
+            con.execute(sql)
+    pos, tags, defs = _Ids(), _Ids(), _Ids()
+
+    con.executemany(
+        "INSERT INTO core_keyed VALUES(?, ?, ?, ?, ?)",
+        ((seq, kanji, kana, pos[p], defs[eng]) for seq, kanji, kana,
+         p, eng in old.execute(
+             "SELECT rowid, kanji, kana, pos, eng FROM core")))
+    con.executemany(
+        "INSERT INTO jp_keyed VALUES(?, ?, ?, ?, ?)",
+        ((seq, kanji, i, reading, tags[t]) for seq, i, kanji, reading,
+         t in old.execute(
+             "SELECT rowid, ID, kanji, reading, tags FROM words_jp")))
+    con.executemany(
+        "INSERT INTO en_keyed VALUES(?, ?, ?)",
+        ((jpid, seq, defs[d]) for seq, jpid, d in old.execute(
+            "SELECT rowid, JPID, def FROM words_en WHERE JPID NOT NULL")))
+    for table, ids in (("pos", pos), ("tags", tags), ("defs", defs)):
+        con.executemany("INSERT INTO " + table + " VALUES(?, ?)",
+                        ((i, value) for value, i in ids.items()))
+
+    # the user table and its indexes as they are
+    for (sql,) in old.execute("""SELECT sql FROM sqlite_master
+                                 WHERE tbl_name = 'user' AND sql NOT NULL
+                                 AND type IN ('table', 'index')
+                                 ORDER BY type = 'index'"""):
+        con.execute(sql)
+    columns = [row[1] for row in old.execute("PRAGMA table_info(user)")]
+    con.executemany(
+        "INSERT INTO user(rowid, " + ", ".join(columns) + ") VALUES("
+        + ", ".join("?" * (len(columns) + 1)) + ")",
+        old.execute("SELECT rowid, * FROM user ORDER BY rowid"))
+    con.execute("COMMIT")
+    con.execute("VACUUM")
+    con.close()
+    old.close()
+    return out
+
+
+# ------------------------------------------------------------------ report
+def zipped_size(path):
+    ''' bytes after deflate, about what dict.zip would take '''
+    z = zlib.compressobj(9, zlib.DEFLATED, -15)
+    size = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            size += len(z.compress(block))
+    return size + len(z.flush())
+
+
+def sample_terms(path, n=SAMPLE):
+    ''' kanji and readings spread evenly through the jmdict table '''
+    con = sqlite3.connect(_uri(path, mode="ro"), uri=True)
+    try:
+        count = con.execute("SELECT count(*) FROM words_jp").fetchone()[0]
+        step = max(1, count // n)
+        rows = con.execute("SELECT kanji, reading FROM words_jp").fetchall()
+    finally:
+        con.close()
+    return rows[::step][:n]
+
+
+def lookup_time(path, terms):
+    ''' (ms to open and answer the first lookup, us per lookup after) '''
+    start = time.perf_counter()
+    con = sqlite3.connect(_uri(path, mode="ro"), uri=True)
+    queries = (CORE_SQL, JMDICT_SQL.format("kanji"),
+               JMDICT_SQL.format("reading"))
+    con.execute(queries[1], (terms[0][0],)).fetchone()
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    for kanji, reading in terms:
+        con.execute(queries[0], (kanji,)).fetchone()
+        con.execute(queries[1], (kanji,)).fetchone()
+        con.execute(queries[2], (reading,)).fetchone()
+    per = (time.perf_counter() - start) / (3 * len(terms))
+    con.close()
+    return first * 1000, per * 1e6
+
+
+def report(before, after, terms):
+    rows = []
+    for label, path in (("before", before), ("after", after)):
+        first, per = lookup_time(path, terms)
+        rows.append((label, os.path.getsize(path) / 1e6,
+                     zipped_size(path) / 1e6, first, per))
+    lines = [f"{'':8}{'size':>10}{'zipped':>10}{'first':>10}{'lookup':>10}"]
+    for label, size, zipped, first, per in rows:
+        lines.append(f"{label:8}{size:8.2f}MB{zipped:8.2f}MB"
+                     f"{first:8.1f}ms{per:8.1f}us")
+    return "\n".join(lines)
+
+
+def write_zip(path):
+    ''' path as a dict.zip would hold it, its sha256 inside and beside it '''
+    import zipfile
+    stem = os.path.splitext(path)[0]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    line = digest.hexdigest() + "  dict.db\n"
+    with zipfile.ZipFile(stem + ".zip", "w", zipfile.ZIP_DEFLATED,
+                         compresslevel=9) as z:
+        z.write(path, "dict.db")
+        z.writestr("dict.sha256", line)
+    with open(stem + ".sha256", "w", encoding="utf-8") as f:
+        f.write(line)
+    return stem + ".zip"
+
+
+def install(path, db=DICT_DB):
+    ''' the compacted db in place of db, the old one kept beside it '''
+    con = sqlite3.connect(db)
+    con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    con.close()
+    os.replace(db, db + ".orig")
+    for ext in ("-wal", "-shm"):
+        if os.path.exists(db + ext):
+            os.remove(db + ext)
+    os.replace(path, db)
+
+
+if __name__ == '__main__':
+    start = time.perf_counter()
+    try:
+        out = compact()
+    except ValueError as e:
+        sys.exit(e)
+    print(f"{out} written in {time.perf_counter() - start:.1f} s")
+    print(report(DICT_DB, out, sample_terms(DICT_DB)))
+    if "--zip" in sys.argv:
+        print(write_zip(out))
+    if "--install" in sys.argv:
+        install(out)
+        print(DICT_DB + " replaced, the old one is " + DICT_DB + ".orig")
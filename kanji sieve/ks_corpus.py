@@ -0,0 +1,176 @@
+# -----------------------------------------#
+#   ks_corpus for Kanji Sieve 1.18
+#   2026-10-19
+#   (c)Robert Belton BSD 3-Clause License
+#
+#
+#   A running index of everything sieved.
+#   Each finished sieve records its kanji
+#   counts, the terms found in each table
+#   and its orphans, so questions across a
+#   whole book are a query, not a re-run:
+#      first_appearance('誕')
+#      new_kanji('chapter 3')
+#      coverage()
+#      top_orphans()
+#
+#   Run it to print a corpus report.
+#
+#   will build:
+#      data/corpus.db
+#
+# -----------------------------------------#
+
+import time
+import sqlite3
+
+CORPUS_DB = "data/corpus.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs(
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    sieved REAL,
+    chars INTEGER,
+    kanji INTEGER,
+    report TEXT);
+CREATE TABLE IF NOT EXISTS doc_kanji(
+    doc INTEGER NOT NULL,
+    kanji TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY(doc, kanji)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS doc_kanji_by_kanji ON doc_kanji(kanji, doc);
+CREATE TABLE IF NOT EXISTS doc_terms(
+    doc INTEGER NOT NULL,
+    term TEXT NOT NULL,
+    tier TEXT NOT NULL,
+    PRIMARY KEY(doc, term)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS doc_terms_by_term ON doc_terms(term, doc);
+CREATE INDEX IF NOT EXISTS doc_terms_by_tier ON doc_terms(tier, term);
+"""
+
+TIERS = ("furigana", "core", "user", "jmdict")
+
+
+def connect(path=CORPUS_DB):
+    con = sqlite3.connect(path, timeout=5)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.executescript(SCHEMA)
+    return con
+
+
+def record(result, report_path="", path=CORPUS_DB):
+    ''' add (or replace) one sieved document, in one transaction '''
+    terms = []
+    for tier in TIERS:
+        for entry in result.get(tier, {}).get("entries", []):
+            terms.append((str(entry[0]), tier))
+    terms += [(word, "orphan") for word in result["orphans"]]
+
+    con = connect(path)
+    try:
+        with con:
+            # a re-sieved document keeps its place in the corpus
+            con.execute(
+                """INSERT INTO docs(name, sieved, chars, kanji, report)
+                   VALUES(?, ?, ?, ?, ?)
+                   ON CONFLICT(name) DO UPDATE SET sieved=excluded.sieved,
+                   chars=excluded.chars, kanji=excluded.kanji,
+                   report=excluded.report""",
+                (result["name"], time.time(), len(result["text"]),
+                 result["kanji_total"], str(report_path)))
+            doc = con.execute("SELECT id FROM docs WHERE name = ?",
+                              (result["name"],)).fetchone()[0]
+            con.execute("DELETE FROM doc_kanji WHERE doc = ?", (doc,))
+            con.execute("DELETE FROM doc_terms WHERE doc = ?", (doc,))
+            con.executemany("INSERT INTO doc_kanji VALUES(?, ?, ?)",
+                            [(doc, k, n) for k, n in result["kanji_count"]])
+            con.executemany("INSERT OR IGNORE INTO doc_terms VALUES(?, ?, ?)",
+                            [(doc, term, tier) for term, tier in terms])
+    finally:
+        con.close()
+    return doc
+
+
+# ---------------------------------------------------------------- queries
+def first_appearance(item, path=CORPUS_DB):
+    ''' (document, count) where a kanji or term is first seen, or None '''
+    con = connect(path)
+    try:
+        if len(item) == 1:
+            row = con.execute(
+                """SELECT d.name, k.count FROM doc_kanji k
+                   JOIN docs d ON d.id = k.doc
+                   WHERE k.kanji = ? ORDER BY k.doc LIMIT 1""",
+                (item,)).fetchone()
+            if row is not None:
+                return row
+        return con.execute(
+            """SELECT d.name, t.tier FROM doc_terms t
+               JOIN docs d ON d.id = t.doc
+               WHERE t.term = ? ORDER BY t.doc LIMIT 1""",
+            (item,)).fetchone()
+    finally:
+        con.close()
+
+
+def new_kanji(name, path=CORPUS_DB):
+    ''' kanji a document introduces to the corpus, most used first '''
+    con = connect(path)
+    try:
+        return con.execute(
+            """SELECT k.kanji, k.count FROM doc_kanji k
+               JOIN docs d ON d.id = k.doc
+               WHERE d.name = ? AND NOT EXISTS (
+                   SELECT 1 FROM doc_kanji e
+                   WHERE e.kanji = k.kanji AND e.doc < k.doc)
+               ORDER BY k.count DESC, k.kanji""",
+            (name,)).fetchall()
+    finally:
+        con.close()
+
+
+def coverage(path=CORPUS_DB):
+    ''' [(document, new kanji, cumulative discrete kanji)] in corpus order '''
+    con = connect(path)
+    try:
+        rows = con.execute(
+            """SELECT d.name, COUNT(f.kanji) FROM docs d
+               LEFT JOIN (SELECT kanji, MIN(doc) AS first FROM doc_kanji
+                          GROUP BY kanji) f ON f.first = d.id
+               GROUP BY d.id ORDER BY d.id""").fetchall()
+    finally:
+        con.close()
+    out = []
+    total = 0
+    for name, new in rows:
+        total += new
+        out.append((name, new, total))
+    return out
+
+
+def top_orphans(n=20, path=CORPUS_DB):
+    ''' [(term, documents)] orphans found in the most documents '''
+    con = connect(path)
+    try:
+        return con.execute(
+            """SELECT term, COUNT(*) AS docs FROM doc_terms
+               WHERE tier = 'orphan' GROUP BY term
+               ORDER BY docs DESC, term LIMIT ?""",
+            (n,)).fetchall()
+    finally:
+        con.close()
+
+
+def report(path=CORPUS_DB):
+    out = "# corpus  \n\n"
+    out += "| document | new kanji | total |\n|:---|---:|---:|\n"
+    for name, new, total in coverage(path):
+        out += f"| {name} | {new} | {total} |\n"
+    out += "\n__most frequent orphans:__  \n"
+    out += " ".join(f"{term}({docs})" for term, docs in top_orphans(path=path))
+    return out + "\n"
+
+
+if __name__ == '__main__':
+    print(report())
@@ -0,0 +1,223 @@
+# -----------------------------------------#
+#   ks_counts for Kanji Sieve 1.18
+#   2026-10-19
+#   (c)Robert Belton BSD 3-Clause License
+#
+#
+#   Small counts for big batches.
+#   Every character the KANJI pattern
+#   matches has a fixed slot, so kanji
+#   counts are typed arrays, not dicts:
+#      KanjiCounts  one text, only the
+#                   kanji it uses (8 bytes
+#                   each)
+#      TermCounts   one text, its terms
+#                   (interned) and counts
+#      Aggregate    many texts, one slot per
+#                   kanji plus interned terms
+#                   with an array of counts
+#   Partial aggregates (eg. from worker
+#   processes) merge with merge().
+#
+# -----------------------------------------#
+
+import re
+import sys
+from array import array
+from collections import Counter
+from ks_engine import KANJI
+
+
+def _ranges(pattern):
+    ''' [(first, last)] code points of a [...] character class '''
+    body = pattern.strip()[1:-1]
+    found = [(ord(a), ord(b or a))
+             for a, b in re.findall(r"(.)(?:-(.))?", body)]
+    merged = []
+    for first, last in sorted(found):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(last, merged[-1][1]))
+        else:
+            merged.append((first, last))
+    return merged
+
+
+RANGES = _ranges(KANJI)
+_STARTS = []  # slot of each range's first character
+SLOTS = 0
+for _first, _last in RANGES:
+    _STARTS.append(SLOTS)
+    SLOTS += _last - _first + 1
+
+
+def slot(kanji):
+    cp = ord(kanji)
+    for (first, last), start in zip(RANGES, _STARTS):
+        if first <= cp <= last:
+            return start + cp - first
+    raise ValueError(repr(kanji) + " is not matched by KANJI")
+
+
+def kanji_at(i):
+    for (first, last), start in zip(RANGES, _STARTS):
+        if i < start + last - first + 1:
+            return chr(first + i - start)
+    raise IndexError(i)
+
+
+class KanjiCounts(object):
+    ''' the kanji one text uses, as sorted slots and their counts '''
+
+    __slots__ = ("slots", "counts")
+
+    def __init__(self, slots=None, counts=None):
+        self.slots = slots if slots is not None else array("I")
+        self.counts = counts if counts is not None else array("I")
+
+    @classmethod
+    def from_text(cls, text):
+        return cls.from_counter(Counter(re.findall(KANJI, text)))
+
+    @classmethod
+    def from_counter(cls, counter):
+        pairs = sorted((slot(k), n) for k, n in counter.items())
+        return cls(array("I", [s for s, n in pairs]),
+                   array("I", [n for s, n in pairs]))
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __getitem__(self, kanji):
+        from bisect import bisect_left
+        s = slot(kanji)
+        i = bisect_left(self.slots, s)
+        if i < len(self.slots) and self.slots[i] == s:
+            return self.counts[i]
+        return 0
+
+    def items(self):
+        return ((kanji_at(s), n) for s, n in zip(self.slots, self.counts))
+
+    def total(self):
+        return sum(self.counts)
+
+    def nbytes(self):
+        return (len(self.slots) * self.slots.itemsize
+                + len(self.counts) * self.counts.itemsize)
+
+    def merge(self, other):
+        ''' a new KanjiCounts with both texts' counts '''
+        slots = array("I")
+        counts = array("I")
+        a, b = self, other
+        i = j = 0
+        while i < len(a.slots) and j < len(b.slots):
+            if a.slots[i] == b.slots[j]:
+                slots.append(a.slots[i])
+                counts.append(a.counts[i] + b.counts[j])
+                i += 1
+                j += 1
+            elif a.slots[i] < b.slots[j]:
+                slots.append(a.slots[i])
+                counts.append(a.counts[i])
+                i += 1
+            else:
+                slots.append(b.slots[j])
+                counts.append(b.counts[j])
+                j += 1
+        slots.extend(a.slots[i:])
+        counts.extend(a.counts[i:])
+        slots.extend(b.slots[j:])
+        counts.extend(b.counts[j:])
+        return KanjiCounts(slots, counts)
+
+
+class TermCounts(object):
+    ''' how often each term occurs in one text '''
+
+    __slots__ = ("terms", "counts")
+
+    def __init__(self, terms=(), counts=None):
+        self.terms = tuple(terms)
+        self.counts = counts if counts is not None else array("I")
+
+    @classmethod
+    def from_tokens(cls, tokens, keep=None):
+        counter = Counter(t for t in tokens if keep is None or keep(t))
+        return cls(map(sys.intern, counter), array("I", counter.values()))
+
+    def __len__(self):
+        return len(self.terms)
+
+    def items(self):
+        return zip(self.terms, self.counts)
+
+    def merge(self, other):
+        counter = Counter(dict(self.items()))
+        counter.update(dict(other.items()))
+        return TermCounts(counter, array("I", counter.values()))
+
+
+class Aggregate(object):
+    ''' kanji and term counts over many texts '''
+
+    def __init__(self):
+        self.docs = 0
+        self.kanji = array("I", bytes(4 * SLOTS))
+        self.term_ids = {}   # term: id
+        self.terms = []      # id: term
+        self.term_counts = array("I")
+
+    def _id(self, term):
+        i = self.term_ids.get(term)
+        if i is None:
+            i = self.term_ids[sys.intern(term)] = len(self.terms)
+            self.terms.append(term)
+            self.term_counts.append(0)
+        return i
+
+    def add_kanji(self, counts):
+        kanji = self.kanji
+        for s, n in zip(counts.slots, counts.counts):
+            kanji[s] += n
+
+    def add_terms(self, counts):
+        term_counts = self.term_counts
+        for term, n in counts.items():
+            term_counts[self._id(term)] += n
+
+    def add_result(self, result):
+        ''' one analysed text '''
+        self.docs += 1
+        if "kanji_counts" in result:
+            self.add_kanji(result["kanji_counts"])
+        else:
+            self.add_kanji(KanjiCounts.from_counter(
+                dict(result["kanji_count"])))
+        if "term_counts" in result:
+            self.add_terms(result["term_counts"])
+
+    def merge(self, other):
+        ''' add another aggregate's counts into this one '''
+        self.docs += other.docs
+        kanji = self.kanji
+        for s, n in enumerate(other.kanji):
+            if n:
+                kanji[s] += n
+        term_counts = self.term_counts
+        for term, n in zip(other.terms, other.term_counts):
+            term_counts[self._id(term)] += n
+        return self
+
+    # ------------------------------------------------------------ queries
+    def top_kanji(self, n=20):
+        best = sorted((c, -s) for s, c in enumerate(self.kanji) if c)
+        return [(kanji_at(-s), c) for c, s in reversed(best[-n:])]
+
+    def top_terms(self, n=20):
+        order = sorted(range(len(self.terms)),
+                       key=lambda i: (-self.term_counts[i], self.terms[i]))
+        return [(self.terms[i], self.term_counts[i]) for i in order[:n]]
+
+    def distinct_kanji(self):
+        return sum(1 for c in self.kanji if c)
@@ -0,0 +1,182 @@
+# -----------------------------------------#
+#   ks_data for Kanji Sieve 1.18
+#   2026-10-19
+#   (c)Robert Belton BSD 3-Clause License
+#
+#
+#   First run set up of data/dict.db.
+#   dict.db is streamed out of dict.zip to
+#   a temp file, checked, then renamed into
+#   place, so nobody ever opens half a db.
+#   Its sha256 must match the one shipped
+#   beside the zip (dict.sha256) or inside
+#   it. A zip with neither is checked by
+#   its crc and size only, with a warning.
+#   The work is done once, under a file
+#   lock, however many sieves ask for it.
+#
+#   uses (if present):
+#      data/dict.zip
+#      data/dict.sha256
+#
+#   will build:
+#      data/dict.db
+#
+# -----------------------------------------#
+
+import os
+import sys
+import shutil
+import hashlib
+import tempfile
+import threading
+
+DATA_DIR = "data"
+DICT_DB = "data/dict.db"
+DICT_ZIP = "data/dict.zip"
+DICT_SUM = "data/dict.sha256"
+LOCK_FILE = "data/.dict.lock"
+
+_CHUNK = 1024 * 1024
+
+_ready = False
+_thread = None
+
+
+class _FileLock(object):
+    ''' exclusive lock shared by threads and processes '''
+
+    _guard = threading.Lock()
+    _locks = {}  # path: thread lock, so holding one file's lock
+                 # doesn't block taking another's
+
+    def __init__(self, path):
+        self.path = path
+        key = os.path.abspath(path)
+        with self._guard:
+            self._local = self._locks.setdefault(key, threading.Lock())
+
+    def __enter__(self):
+        self._local.acquire()
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            import fcntl
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+        except ImportError:
+            pass  # no flock, the thread lock still holds in one process
+        return self
+
+    def __exit__(self, *exc):
+        os.close(self.fd)  # closing drops the flock
+        self._local.release()
+        return False
+
+
+def _first_word(text):
+    text = text.split()
+    return text[0].lower() if text else None
+
+
+def read_checksum(path=DICT_SUM):
+    if not os.path.isfile(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return _first_word(f.read())
+
+
+def _expected(zip, zip_path):
+    # beside the zip, eg. dict.sha256 for dict.zip, or inside it
+    expected = read_checksum(os.path.splitext(zip_path)[0] + ".sha256")
+    if expected is None:
+        names = [n for n in zip.namelist() if n.endswith(".sha256")
+                 and not n.startswith("__MACOSX")]
+        if names:
+            expected = _first_word(zip.read(names[0]).decode("utf-8"))
+    return expected
+
+
+def _extract(zip_path, db_path):
+    import zipfile
+    with zipfile.ZipFile(zip_path, "r") as zip:
+        members = [m for m in zip.infolist()
+                   if m.filename.endswith(os.path.basename(db_path))
+                   and not m.filename.startswith("__MACOSX")]
+        if not members:
+            raise RuntimeError(zip_path + " has no " + db_path)
+        member = members[0]
+        expected = _expected(zip, zip_path)
+        if expected is None:
+            print("warning: no sha256 for " + zip_path + ", dict.db is "
+                  "only checked by its crc and size", file=sys.stderr)
+        digest = hashlib.sha256()
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(db_path) or ".",
+                                   prefix=".dict.", suffix=".tmp")
+        try:
+            # zipfile checks the crc when the member is read to the end,
+            # as testzip() would
+            with zip.open(member) as src, os.fdopen(fd, "wb") as dst:
+                while True:
+                    chunk = src.read(_CHUNK)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    dst.write(chunk)
+                dst.flush()
+                os.fsync(dst.fileno())
+            if os.path.getsize(tmp) != member.file_size:
+                raise RuntimeError("dict.db size mismatch, zip truncated?")
+            if expected is not None and digest.hexdigest() != expected:
+                raise RuntimeError("dict.db checksum mismatch")
+            os.replace(tmp, db_path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+
+def ensure_dict_db(zip_path=DICT_ZIP, db_path=DICT_DB):
+    ''' make sure dict.db exists, extracting it on the first run '''
+    global _ready, _thread
+    if _ready:
+        return db_path
+    if _thread is not None and _thread is not threading.current_thread():
+        _thread.join()
+        # a failed try is not kept: this one tries again and raises
+        # whatever is still wrong, or finds the zip has been fixed
+        _thread = None
+    if os.path.isfile(db_path):
+        _ready = True
+        return db_path
+    # beside the db, LOCK_FILE for the default one
+    lock = os.path.join(os.path.dirname(db_path), os.path.basename(LOCK_FILE))
+    with _FileLock(lock):
+        # another sieve may have finished while we waited
+        if not os.path.isfile(db_path):
+            if not os.path.isfile(zip_path):
+                raise FileNotFoundError("neither " + db_path
+                                        + " nor " + zip_path + " found")
+            print("unzipping '" + zip_path + "'...", file=sys.stderr)
+            _extract(zip_path, db_path)
+            # cleanup, also of a '__MACOSX' folder left by older versions
+            os.remove(zip_path)
+            macosx = os.path.join(os.path.dirname(zip_path), "__MACOSX")
+            if os.path.isdir(macosx):
+                shutil.rmtree(macosx)
+    _ready = True
+    return db_path
+
+
+def prepare_dict_db():
+    ''' start ensure_dict_db in the background, eg. while a file is picked '''
+    global _thread
+
+    def run():
+        try:
+            ensure_dict_db()
+        except Exception:
+            pass  # the sieve's own ensure_dict_db() tries again and raises
+
+    if _ready or _thread is not None or os.path.isfile(DICT_DB):
+        return
+    _thread = threading.Thread(target=run, daemon=True)
+    _thread.start()
@@ -0,0 +1,153 @@
+# -----------------------------------------#
+#   ks_db for Kanji Sieve 1.18
+#   2026-10-19
+#   (c)Robert Belton BSD 3-Clause License
+#
+#
+#   Shared access to data/dict.db.
+#   The db is kept in WAL mode so readers
+#   never wait on the writer.
+#   Readers get pooled connections, one per
+#   thread, process and db file:
+#      lexicon() - core & jmdict tables
+#      reader()  - the user table
+#   Both are read only and see what is
+#   written: dict.db is written by the user
+#   table's writer, ks_fts.py and
+#   ks_compact.py, so none of it is opened
+#   immutable.
+#   All writes to the user table go through
+#   one writer connection.
+#
+#   requires:
+#      data/dict.db
+#
+# -----------------------------------------#
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.parse import quote
+from ks_data import DICT_DB, ensure_dict_db
+
+BUSY_TIMEOUT = 5000  # ms
+
+_local = threading.local()
+_wal_lock = threading.Lock()
+_wal_pid = None
+_wal_done = set()  # paths this process switched to WAL
+_writer = None
+_writer_pid = None
+_writer_lock = threading.Lock()
+
+
+def _uri(path, **params):
+    query = "&".join(k + "=" + str(v) for k, v in params.items())
+    return "file:" + quote(os.path.abspath(path)) + "?" + query
+
+
+def init_wal(db=DICT_DB):
+    ''' switch a db to WAL and flush it, once per process and path '''
+    global _wal_pid
+    path = os.path.abspath(db)
+    with _wal_lock:
+        if _wal_pid != os.getpid():
+            _wal_done.clear()
+            _wal_pid = os.getpid()
+        if path in _wal_done:
+            return
+        if path == os.path.abspath(DICT_DB):
+            ensure_dict_db()
+        con = sqlite3.connect(path, timeout=BUSY_TIMEOUT / 1000)
+        try:
+            con.execute("PRAGMA journal_mode=WAL")
+            # start with a short wal
+            con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            con.close()
+        _wal_done.add(path)
+
+
+def _pooled(name, db):
+    # connections are never shared across a fork
+    pool = getattr(_local, "pool", None)
+    if pool is None or _local.pid != os.getpid():
+        pool = _local.pool = {}
+        _local.pid = os.getpid()
+    key = (name, os.path.abspath(db))
+    con = pool.get(key)
+    if con is None:
+        init_wal(db)
+        con = sqlite3.connect(_uri(db, mode="ro"), uri=True,
+                              timeout=BUSY_TIMEOUT / 1000)
+        con.execute("PRAGMA query_only=1")
+        pool[key] = con
+    return con
+
+
+def lexicon(db=DICT_DB):
+    ''' connection for the core and jmdict tables '''
+    return _pooled("lexicon", db)
+
+
+def reader(db=DICT_DB):
+    ''' read only connection that follows the user table '''
+    return _pooled("reader", db)
+
+
+def close_all():
+    ''' close this thread's readers (the writer is closed by close_writer) '''
+    pool = getattr(_local, "pool", None) or {}
+    for con in pool.values():
+        con.close()
+    pool.clear()
+
+
+# -------------------------------------------------------------- the writer
+def _get_writer(db=DICT_DB):
+    global _writer, _writer_pid
+    if _writer is None or _writer_pid != os.getpid():
+        init_wal(db)
+        _writer = sqlite3.connect(db, timeout=BUSY_TIMEOUT / 1000,
+                                  isolation_level=None,
+                                  check_same_thread=False)
+        _writer_pid = os.getpid()
+    return _writer
+
+
+@contextmanager
+def transaction():
+    ''' the writer connection, inside BEGIN IMMEDIATE ... COMMIT '''
+    with _writer_lock:
+        con = _get_writer()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            yield con
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+
+
+def write(sql, rows=None):
+    ''' run one statement (executemany with rows) in its own transaction '''
+    with transaction() as con:
+        if rows is None:
+            cur = con.execute(sql)
+        else:
+            cur = con.executemany(sql, rows)
+    return cur.rowcount
+
+
+def insert_user_rows(rows):
+    ''' rows of (kanji, kana, eng, pos, jp) '''
+    return write("INSERT INTO user VALUES(?, ?, ?, ?, ?)", rows)
+
+
+def close_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is not None and _writer_pid == os.getpid():
+            _writer.close()
+        _writer = None
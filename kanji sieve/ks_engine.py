@@ -0,0 +1,852 @@
+# -----------------------------------------#
+#   ks_engine for Kanji Sieve 1.18
+#   2026-10-19
+#   (c)Robert Belton BSD 3-Clause License
+#
+#
+#   The sieve without the gui.
+#   Counts and grades the kanji in a text,
+#   segments it, searches the dictionary
+#   tables and renders the markdown report.
+#
+#   Nothing here imports pythonista modules,
+#   markdown2, zipfile, csv or webbrowser.
+#   tinysegmenter is imported on first use.
+#
+#   requires:
+#      data/dict.db
+#
+#   dependencies:
+#      tinysegmenter
+#      ks_data.py, ks_db.py, ks_normal.py, ks_orphans.py, ks_paths.py,
+#      ks_profile.py
+#      (same directory)
+#
+# -----------------------------------------#
+
+import re
+import os
+import time
+import json
+import heapq
+from operator import itemgetter
+from collections import Counter
+import ks_db
+import ks_normal
+import ks_orphans
+from ks_paths import unique_path
+from ks_profile import Profiler
+from ks_data import ensure_dict_db
+
+# ------------------------------------------------------------------- constants
+VERSION = "1.18"
+
+# decoration snippets
+_LINE_ = "\n----------------\n"
+
+# regex patterns
+# 々, the unified ideographs with extensions A to G and the compatibility
+# ideographs; escapes, as an editor may normalize the literal characters
+KANJI_CHARS = ('\u3005\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+               '\U00020000-\U0002a6df\U0002a700-\U0002ebef'
+               '\U0002f800-\U0002fa1f\U00030000-\U0003134f')
+KANJI = '[' + KANJI_CHARS + ']'
+ASCII_CHAR = r'[ -~]'
+WORD_CHAR = '[ぁ-ヿ' + KANJI_CHARS + ']'  # kana or kanji
+
+# link schemes -- name: (prefix, postfix)
+URL_SCHEMES = {
+    "weblio": ("https://ejje.weblio.jp/content/", ""),
+    "eijiro": ("https://eow.alc.co.jp/search?q=", ""),
+    "jisho": ("https://jisho.org/search/", ""),
+    "reikoku": ("mkreikoku:///search?text=", ""),
+    "wik-eng": ("https://en.m.wiktionary.org/wiki/", "#Japanese"),
+    "wik-jpn": ("https://ja.m.wiktionary.org/wiki/", ""),
+}
+
+# kyouiku lists #
+K1 = """一 右 雨 円 王 音 下 火 花 貝 学 気 九 休 玉 金 空 月 犬 見 五 口 校 左 三 山 子 四 糸 字 耳 七 車 手 十 出
+ 女 小 上 森 人 水 正 生 青 夕 石 赤 千 川 先 早 草 足 村 大 男 竹 中 虫 町 天 田 土 二 日 入 年 白 八 百 文 木 本 名
+ 目 立 力 林 六"""
+K2 = """引 羽 雲 園 遠 何 科 夏 家 歌 画 回 会 海 絵 外 角 楽 活 間 丸 岩 顔 汽 記 帰 弓 牛 魚 京 強 教 近 兄 形 計
+ 元 言 原 戸 古 午 後 語 工 公 広 交 光 考 行 高 黄 合 谷 国 黒 今 才 細 作 算 止 市 矢 姉 思 紙 寺 自 時 室 社 弱 首
+ 秋 週 春 書 少 場 色 食 心 新 親 図 数 西 声 星 晴 切 雪 船 線 前 組 走 多 太 体 台 地 池 知 茶 昼 長 鳥 朝 直 通 弟
+ 店 点 電 刀 冬 当 東 答 頭 同 道 読 内 南 肉 馬 売 買 麦 半 番 父 風 分 聞 米 歩 母 方 北 毎 妹 万 明 鳴 毛 門 夜 野
+ 友 用 曜 来 里 理 話"""
+K3 = """悪 安 暗 医 委 意 育 員 院 飲 運 泳 駅 央 横 屋 温 化 荷 界 開 階 寒 感 漢 館 岸 起 期 客 究 急 級 宮 球 去
+ 橋 業 曲 局 銀 区 苦 具 君 係 軽 血 決 研 県 庫 湖 向 幸 港 号 根 祭 皿 仕 死 使 始 指 歯 詩 次 事 持 式 実 写 者 主
+ 守 取 酒 受 州 拾 終 習 集 住 重 宿 所 暑 助 昭 消 商 章 勝 乗 植 申 身 神 真 深 進 世 整 昔 全 相 送 想 息 速 族 他
+ 打 対 待 代 第 題 炭 短 談 着 注 柱 丁 帳 調 追 定 庭 笛 鉄 転 都 度 投 豆 島 湯 登 等 動 童 農 波 配 倍 箱 畑 発 反
+ 坂 板 皮 悲 美 鼻 筆 氷 表 秒 病 品 負 部 服 福 物 平 返 勉 放 味 命 面 問 役 薬 由 油 有 遊 予 羊 洋 葉 陽 様 落 流
+ 旅 両 緑 礼 列 練 路 和"""
+K4 = """愛 案 以 衣 位 囲 胃 印 英 栄 塩 億 加 果 貨 課 芽 改 械 害 街 各 覚 完 官 管 関 観 願 希 季 紀 喜 旗 器 機
+ 議 求 泣 救 給 挙 漁 共 協 鏡 競 極 訓 軍 郡 径 型 景 芸 欠 結 建 健 験 固 功 好 候 航 康 告 差 菜 最 材 昨 札 刷 殺
+ 察 参 産 散 残 士 氏 史 司 試 児 治 辞 失 借 種 周 祝 順 初 松 笑 唱 焼 象 照 賞 臣 信 成 省 清 静 席 積 折 節 説 浅
+ 戦 選 然 争 倉 巣 束 側 続 卒 孫 帯 隊 達 単 置 仲 貯 兆 腸 低 底 停 的 典 伝 徒 努 灯 堂 働 特 得 毒 熱 念 敗 梅 博
+ 飯 飛 費 必 票 標 不 夫 付 府 副 粉 兵 別 辺 変 便 包 法 望 牧 末 満 未 脈 民 無 約 勇 要 養 浴 利 陸 良 料 量 輪 類
+ 令 冷 例 歴 連 老 労 録"""
+K5 = """圧 移 因 永 営 衛 易 益 液 演 応 往 桜 恩 可 仮 価 河 過 賀 快 解 格 確 額 刊 幹 慣 眼 基 寄 規 技 義 逆 久
+ 旧 居 許 境 均 禁 句 群 経 潔 件 券 険 検 限 現 減 故 個 護 効 厚 耕 鉱 構 興 講 混 査 再 災 妻 採 際 在 財 罪 雑 酸
+ 賛 支 志 枝 師 資 飼 示 似 識 質 舎 謝 授 修 述 術 準 序 招 承 証 条 状 常 情 織 職 制 性 政 勢 精 製 税 責 績 接 設
+ 舌 絶 銭 祖 素 総 造 像 増 則 測 属 率 損 退 貸 態 団 断 築 張 提 程 適 敵 統 銅 導 徳 独 任 燃 能 破 犯 判 版 比 肥
+ 非 備 俵 評 貧 布 婦 富 武 復 複 仏 編 弁 保 墓 報 豊 防 貿 暴 務 夢 迷 綿 輸 余 預 容 略 留 領"""
+K6 = """異 遺 域 宇 映 延 沿 我 灰 拡 革 閣 割 株 干 巻 看 簡 危 机 揮 貴 疑 吸 供 胸 郷 勤 筋 系 敬 警 劇 激 穴 絹
+ 権 憲 源 厳 己 呼 誤 后 孝 皇 紅 降 鋼 刻 穀 骨 困 砂 座 済 裁 策 冊 蚕 至 私 姿 視 詞 誌 磁 射 捨 尺 若 樹 収 宗 就
+ 衆 従 縦 縮 熟 純 処 署 諸 除 将 傷 障 城 蒸 針 仁 垂 推 寸 盛 聖 誠 宣 専 泉 洗 染 善 奏 窓 創 装 層 操 蔵 臓 存 尊
+ 宅 担 探 誕 段 暖 値 宙 忠 著 庁 頂 潮 賃 痛 展 討 党 糖 届 難 乳 認 納 脳 派 拝 背 肺 俳 班 晩 否 批 秘 腹 奮 並 陛
+ 閉 片 補 暮 宝 訪 亡 忘 棒 枚 幕 密 盟 模 訳 郵 優 幼 欲 翌 乱 卵 覧 裏 律 臨 朗 論"""
+
+# prefs a prefs file does not have yet, the later additions off
+DEFAULT_PREFS = {'dict': 'weblio', 'tsv_out': '1', 'orphan_out': '1',
+                 'kyouiku': '1', 'core': '1', 'user': '1', 'orphan': '1',
+                 'jmdict': '1', 'add_orphans': '1', 'profile': '0',
+                 'cprofile': '0', 'corpus': '1', 'window': '0',
+                 'html_out': '0', 'order': 'text', 'segmenter': 'tiny',
+                 'normalize': '1', 'kanjidic': '0', 'furigana': '1',
+                 'near': '0'}
+# prefs for a first run, when there is no prefs file to keep as it was
+NEW_INSTALL_PREFS = dict(DEFAULT_PREFS, window='500', kanjidic='1', near='1')
+
+# grade buckets in report order, 0 is 中学以上
+GRADES = ((1, K1), (2, K2), (3, K3), (4, K4), (5, K5), (6, K6))
+_GRADE_OF = {k: level for level, kyouiku in GRADES for k in kyouiku.split()}
+
+_segmenter = None
+
+
+def get_segmenter(prefs=None):
+    ''' tinysegmenter, or ks_scan's longest-match scanner when the
+        segmenter pref is lexicon '''
+    if (prefs or {}).get("segmenter", "tiny") == "lexicon":
+        import ks_scan
+        return ks_scan.load()
+    # tinysegmenter is only imported by the first sieve
+    global _segmenter
+    if _segmenter is None:
+        import tinysegmenter  # 3rd party
+        _segmenter = tinysegmenter.TinySegmenter()
+    return _segmenter
+
+
+def url_scheme(choice):
+    return URL_SCHEMES.get(choice, ("", ""))
+
+
+# ------------------------------------------------------------ ksv data files
+def read_ksv(path):
+    ''' rows of a .ksv file, skipping blank and '//' lines '''
+    rows = []
+    if not os.path.isfile(path):
+        return rows
+    with open(path, encoding='utf-8', newline='\n') as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            if line == "" or "//" in line:
+                continue
+            rows.append(line.split(","))
+    return rows
+
+
+def read_prefs(path="data/kanji_sieve.pref"):
+    ''' the gui's saved prefs over the defaults, without writing them '''
+    if not os.path.isfile(path):
+        return dict(NEW_INSTALL_PREFS)
+    prefs = dict(DEFAULT_PREFS)
+    prefs.update({row[0]: row[1] for row in read_ksv(path) if len(row) > 1})
+    return prefs
+
+
+def load_subs(path="data/sub.ksv"):
+    return {row[0]: row[1] for row in read_ksv(path) if len(row) > 1}
+
+
+def load_omits(path="data/omit.ksv"):
+    return [row[0] for row in read_ksv(path)]
+
+
+# ----------------------------------------------------------- prettify text
+# list of tuples [(x,y)] to string x(y)
+def pretty(text):
+    text = " ".join(map(str, text))
+    text = text.replace("(", "").replace(", ", "(").replace("'", "")
+    return text
+
+
+# list of words to string  a, b, c
+def plain(words):
+    return str(words).replace("[", "").replace("'", "").replace("]", "")
+
+
+# --------------------------------------------------------------- analysis
+def grade_buckets(kanji_count):
+    ''' {grade: [(kanji, count)]}, 0 for kanji past the kyouiku lists '''
+    grades = {1: [], 2: [], 3: [], 4: [], 5: [], 6: [], 0: []}
+    for i in kanji_count:
+        for level, kyouiku in GRADES:
+            if i[0] in kyouiku:
+                grades[level].append(i)
+                break
+        else:
+            grades[0].append(i)
+    return grades
+
+
+def kanji_info(kanji_count, prefs):
+    ''' {kanji: (strokes, radical, on, kun, meanings)} from data/kanji.ksk,
+        empty when the kanjidic pref is off or the table was never built '''
+    if prefs.get("kanjidic", "0") != "1":
+        return {}
+    import ks_kanjidic
+    table = ks_kanjidic.load()
+    if table is None:
+        return {}
+    info = {}
+    for k, n in kanji_count:
+        entry = table.get(k)
+        if entry is not None:
+            info[k] = entry
+    return info
+
+
+def near_matches(words, prefs):
+    ''' {orphan: [terms a character or so away]} from ks_near.py, empty
+        when the near pref is off '''
+    if prefs.get("near", "0") != "1" or not words:
+        return {}
+    import ks_near
+    return ks_near.load().suggest_all(words)
+
+
+def subst_info(segments, subdict, seen, end):
+    ''' {term: (count, first offset)} after substitution, "x" dropped '''
+    info = {}
+    for segment in segments:
+        term = subdict.get(segment, segment)
+        count, first = seen.get(segment, (0, end))
+        if term in info:
+            count, first = count + info[term][0], min(first, info[term][1])
+        info[term] = (count, first)
+    info.pop("x", None)
+    # segments may come from a set, the text order keeps the json stable
+    return dict(sorted(info.items(), key=lambda i: (i[1][1], i[0])))
+
+
+def term_grade(term):
+    ''' the highest school grade of a term's kanji, 7 past grade 6 '''
+    return max((_GRADE_OF.get(k, 7) for k in re.findall(KANJI, term)),
+               default=0)
+
+
+def term_order(prefs, term_info):
+    ''' sort key for terms, by the order pref: text, frequency or grade '''
+    order = prefs.get("order", "text")
+    if order == "frequency":
+        return lambda t: (-term_info[t][0], term_info[t][1], t)
+    if order == "grade":
+        return lambda t: (term_grade(t), term_info[t][1], t)
+    return lambda t: (term_info[t][1], t)
+
+
+def analyse(text, prefs, prof=None):
+    ''' kanji count, grade buckets and the word lists to search '''
+    prof = prof or Profiler()
+    result = {"text": text}  # as written, for the report
+
+    # ------------------------------------ one spelling for each word
+    if prefs.get("normalize", "1") == "1":
+        with prof.stage("normalize"):
+            text = ks_normal.fold(text)
+            if text != result["text"]:
+                result["normal"] = text
+
+    # ---------------------------- extract kanji - count kanji - sort count
+    with prof.stage("count kanji"):
+        from ks_counts import KanjiCounts, TermCounts
+        text2 = re.findall(KANJI, text)
+        counts = Counter(text2)  # keys in order of first appearance
+        result["kanji_counts"] = KanjiCounts.from_counter(counts)
+        # most used first, ties in the order they appear
+        kanji_count = sorted(counts.items(), key=lambda a: a[1], reverse=True)
+
+        # ----------------------------------- sieve and seperate kanji by level
+        grades = grade_buckets(kanji_count)
+
+    result.update({"kanji_total": len(text2), "kanji_count": kanji_count,
+                   "grades": grades})
+
+    # ------------------------------------- readings, meanings, strokes
+    with prof.stage("kanjidic"):
+        info = kanji_info(kanji_count, prefs)
+        if info:
+            result["kanji_info"] = info
+
+    # word list --  segment text then discard all but kanji groups #
+    with prof.stage("segment"):
+        tokens = get_segmenter(prefs).tokenize(text)
+        text_tokenized = ' | '.join(tokens)
+        word_list = text_tokenized.split(" | ")
+        prof.count("tokens", len(word_list))
+        result["term_counts"] = TermCounts.from_tokens(
+            tokens, re.compile(WORD_CHAR).search)
+        # how often each segment occurs, and where it first does
+        seen = {}
+        offset = 0
+        for token in tokens:
+            if token in seen:
+                seen[token][0] += 1
+            else:
+                seen[token] = [1, offset]
+            offset += len(token)
+
+    # ---------------------------------------------- filter for kanji words
+    with prof.stage("filter"):
+        # every kanji in a segment is one of the text's kanji
+        kanji_segments = set(filter(re.compile(KANJI).search, word_list))
+
+        # ----------------------------------------------- filter for kana words
+        # filter segments beginning or ending with ッ or っ as non-words
+        word_list = [x for x in word_list
+                     if re.search(r"^っ.|.っ$|^ッ.|.ッ$", x) is None]
+        kana_segments = set()
+        for x in word_list:
+            if (len(x) >= 3
+                and re.search(KANJI, x) is None
+                and re.search(ASCII_CHAR, x) is None):
+                kana_segments.add(x)
+
+        # substitute values, a substitute counts for the segments it replaces
+        subdict = load_subs()
+        term_info = subst_info(kanji_segments | kana_segments, subdict, seen,
+                               len(text))
+        kana_words = set(subdict.get(x, x) for x in kana_segments)
+
+        # the one sort: everything after keeps this order
+        listed = sorted(term_info, key=term_order(prefs, term_info))
+        kana_word_list = [x for x in listed if x in kana_words]
+
+        # ----------------------------------------------------------- omit list
+        omitwordlist = set(load_omits())
+        omitted_words = [x for x in listed if x in omitwordlist]
+        kanji_word_list = [x for x in listed if x not in omitwordlist]
+
+    result.update({"listed": listed, "words": kanji_word_list,
+                   "kana_words": kana_word_list, "omitted": omitted_words,
+                   "tokens": tokens, "term_info": term_info})
+
+    # ------------------------------------------------------- reader profile
+    if prefs.get("reader", ""):
+        with prof.stage("reader"):
+            import ks_readers
+            reader = ks_readers.load(prefs["reader"])
+            result["words"], known = reader.split_terms(kanji_word_list)
+            result["known"] = known
+            result["known_kanji"] = reader.split_kanji(kanji_count)[1]
+
+    # ------------------------------------------------ comprehensibility
+    if prefs.get("window", "0") not in ("", "0"):
+        with prof.stage("window"):
+            import ks_window
+            result["window"] = ks_window.score(result, prefs)
+    return result
+
+
+# ------------------------------------------------------------- dictionaries
+CORE_SQL = """SELECT core.kanji, core.kana, core.pos, core.eng
+              FROM core WHERE core.kanji = ? """
+USER_SQL = """SELECT user.kanji, user.kana, user.pos, user.eng, user.jp
+              FROM user WHERE user.kanji = ? """
+JMDICT_SQL = """SELECT words_jp.kanji, words_jp.reading,
+                       words_jp.tags, words_en.def
+                FROM words_jp  INNER JOIN words_en ON words_jp.ID=words_en.JPID
+                WHERE words_jp.{} = ? """
+
+
+BATCH_MAX = 500  # bound parameters per IN query
+
+_UNSEEN = object()
+
+
+def search(con, sql, targets, prof, cache=None):
+    ''' first row for each target, and the targets not found '''
+    hits = (cache or {}).get(sql, {})
+    found = []
+    remaining = []
+    for target in targets:
+        definition = hits.get(target, _UNSEEN)
+        if definition is _UNSEEN:
+            prof.count("queries")
+            definition = con.execute(sql, (target,)).fetchone()
+        else:
+            prof.count("cache hits")
+        if definition is not None:
+            found.append(definition)
+        else:
+            remaining.append(target)
+    return found, remaining
+
+
+def prefetch(con, sql, targets, cache, prof, key=0):
+    ''' look up many targets with IN queries, rows go in cache[sql] '''
+    many = sql.replace("= ?", "IN ({})")
+    hits = cache.setdefault(sql, {})
+    targets = [t for t in targets if t not in hits]
+    for i in range(0, len(targets), BATCH_MAX):
+        chunk = targets[i:i + BATCH_MAX]
+        prof.count("queries")
+        rows = con.execute(many.format(",".join("?" * len(chunk))), chunk)
+        for row in rows:
+            # the first row, as fetchone() would return it
+            hits.setdefault(row[key], row)
+        for target in chunk:
+            hits.setdefault(target, None)
+    return hits
+
+
+def lookup(result, prefs, prof=None, cache=None):
+    ''' core -> user -> jmdict, each tier searches what the last left '''
+    if cache is None:
+        # one IN query per table rather than one query per word
+        return lookup_batch([result], prefs, prof)[0]
+    prof = prof or Profiler()
+    with prof.stage("unzip"):
+        ensure_dict_db()
+    lexicon = ks_db.lexicon()  # core & jmdict
+    reader = ks_db.reader()    # user table
+    kana_word_list = result["kana_words"]
+
+    # ------------------------------------------- readings from furigana
+    words, furigana = furigana_tier(result, prefs)
+    if furigana is not None:
+        result["furigana"] = furigana
+
+    # ----------------------------------------------------- search corelist
+    with prof.stage("core"):
+        if prefs["core"] == "1":
+            found, core_remaining_words = search(
+                lexicon, CORE_SQL, words, prof, cache)
+            result["core"] = {"entries": found,
+                              "remaining": core_remaining_words}
+        else:
+            core_remaining_words = words
+
+    # --------------------------------------------------- search user table
+    with prof.stage("user"):
+        if prefs["user"] == "1":
+            found, sieve_remaining_words = search(
+                reader, USER_SQL, core_remaining_words, prof, cache)
+            result["user"] = {"entries": found,
+                              "remaining": sieve_remaining_words}
+        else:
+            sieve_remaining_words = core_remaining_words
+
+    # ------------------------------------------------------- search jmdict
+    with prof.stage("jmdict"):
+        if prefs["jmdict"] == "1":
+            # search for kanji and katakana
+            found, jm_remaining_words = search(
+                lexicon, JMDICT_SQL.format("kanji"),
+                sieve_remaining_words, prof, cache)
+
+            # ------------------------------------- search jmdict for kana only
+            kana = set(kana_word_list)
+            sieve_remaining_kana = [w for w in jm_remaining_words if w in kana]
+            found_kana, jm_remaining_kana = search(
+                lexicon, JMDICT_SQL.format("reading"),
+                sieve_remaining_kana, prof, cache)
+            # katakana for a hiragana word, eg. ネコ, is tried as ねこ
+            variants = ks_normal.kana_variants(jm_remaining_kana)
+            found_variants, missed = search(
+                lexicon, JMDICT_SQL.format("reading"), list(variants), prof,
+                cache)
+            jm_remaining_kana = [w for w in jm_remaining_kana
+                                 if ks_normal.hiragana(w) not in variants
+                                 or ks_normal.hiragana(w) in missed]
+            # each list keeps the words' order, merge them back into it
+            rank = {w: i for i, w in enumerate(sieve_remaining_words)}
+            variant_rank = {v: rank[w] for v, w in variants.items()}
+            entries = heapq.merge(
+                ((rank[row[0]], row) for row in found),
+                ((rank[row[1]], row) for row in found_kana),
+                ((variant_rank[row[1]], row) for row in found_variants),
+                key=itemgetter(0))
+            left = set(jm_remaining_kana)
+            remaining_words = [w for w in jm_remaining_words
+                               if w in left or w not in kana]
+            result["jmdict"] = {"entries": [row for i, row in entries],
+                                "remaining": remaining_words}
+        else:
+            remaining_words = [] + sieve_remaining_words
+
+    result["orphans"] = remaining_words
+    # --------------------------------------------- misreads of known words
+    with prof.stage("near"):
+        near = near_matches(remaining_words, prefs)
+        if near:
+            result["near"] = near
+    return result
+
+
+def furigana_tier(result, prefs):
+    ''' (words left to search, the furigana tier or None): words the
+        text's own furigana gave a reading for need no query '''
+    readings = result.get("readings")
+    if not readings or prefs.get("furigana", "1") != "1":
+        return result["words"], None
+    entries = []
+    remaining = []
+    for word in result["words"]:
+        if word in readings:
+            entries.append((word, readings[word], "furigana", ""))
+        else:
+            remaining.append(word)
+    return remaining, {"entries": entries, "remaining": remaining}
+
+
+def lookup_batch(results, prefs, prof=None):
+    ''' lookup() for several texts, with one set of queries per tier '''
+    prof = prof or Profiler()
+    with prof.stage("unzip"):
+        ensure_dict_db()
+    lexicon = ks_db.lexicon()
+    reader = ks_db.reader()
+    cache = {}
+    # every word a tier will be asked for, in any of the texts
+    words = sorted(set(w for result in results
+                       for w in furigana_tier(result, prefs)[0]))
+    if prefs.get("segmenter", "tiny") == "lexicon":
+        # only lexicon terms can be found, the rest need no queries
+        import ks_lexicon
+        terms = ks_lexicon.load()
+        missing = [w for w in words if w not in terms
+                   and ks_normal.hiragana(w) not in terms]
+        missing_set = set(missing)
+        words = [w for w in words if w not in missing_set]
+        for sql in (CORE_SQL, USER_SQL, JMDICT_SQL.format("kanji"),
+                    JMDICT_SQL.format("reading")):
+            cache[sql] = dict.fromkeys(missing)
+    with prof.stage("batch"):
+        if prefs["core"] == "1":
+            hits = prefetch(lexicon, CORE_SQL, words, cache, prof)
+            words = [w for w in words if hits[w] is None]
+        if prefs["user"] == "1":
+            hits = prefetch(reader, USER_SQL, words, cache, prof)
+            words = [w for w in words if hits[w] is None]
+        if prefs["jmdict"] == "1":
+            sql = JMDICT_SQL.format("kanji")
+            hits = prefetch(lexicon, sql, words, cache, prof)
+            kana = set(w for result in results for w in result["kana_words"])
+            words = [w for w in words if hits[w] is None and w in kana]
+            sql = JMDICT_SQL.format("reading")
+            hits = prefetch(lexicon, sql, words, cache, prof, key=1)
+            variants = ks_normal.kana_variants(
+                w for w in words if hits[w] is None)
+            if prefs.get("segmenter", "tiny") == "lexicon":
+                for v in variants:
+                    if v not in terms:
+                        cache[sql].setdefault(v)
+            prefetch(lexicon, sql, list(variants), cache, prof, key=1)
+    for result in results:
+        lookup(result, prefs, prof, cache)
+    return results
+
+
+def definition_search(query, prefs=None, limit=20):
+    ''' [(tier, kanji, kana, definition)] for english words (or user
+        table japanese), best first, the last word a prefix; ks_fts.py '''
+    import ks_fts
+    prefs = prefs or DEFAULT_PREFS
+    tiers = [t for t in ("user", "core", "jmdict") if prefs.get(t) == "1"]
+    return ks_fts.search(query, tiers, limit)
+
+
+def sieve_text(text, prefs, prof=None, name="", readings=None):
+    ''' the whole analysis of one text, no output written; readings
+        {kanji: reading} are the text's furigana, see remove_furigana.py '''
+    prof = prof or Profiler()
+    result = analyse(text, prefs, prof)
+    result["name"] = name
+    if readings:
+        result["readings"] = readings
+    return lookup(result, prefs, prof)
+
+
+# -------------------------------------------------------------- rendering
+def entry_md(entry, tier, scheme):
+    prefix, postfix = scheme
+    link = ("[" + str(entry[0]) + "]"
+            + "(" + prefix + str(entry[0]) + postfix + ")")
+    if tier == "user":
+        return (link + " :"
+                + "【" + str(entry[1]) + "】"
+                + " (" + str(entry[2]) + ") "
+                + str(entry[3]) + ", "
+                + str(entry[4]) + "  \n")
+    return (link + " : "
+            + "【" + str(entry[1]) + "】"
+            + " (" + str(entry[2]) + ") "
+            + str(entry[3]) + "  \n")
+
+
+def tier_md(result, tier, scheme):
+    return "".join(entry_md(e, tier, scheme)
+                   for e in result[tier]["entries"])
+
+
+def orphan_md(words, scheme, near=None):
+    orphan = ""
+    for word in words:
+        orphan = (orphan + "[" + word + "]"
+                  + "(" + scheme[0] + word + ") :")
+        if near and word in near:
+            orphan += " ≈ " + ", ".join("[" + term + "]"
+                                        + "(" + scheme[0] + term + ")"
+                                        for term in near[word])
+        orphan += "  \n"
+    return orphan
+
+
+def kanji_md(info):
+    details = "".join(
+        f"{k} {e[0]}画 部首{e[1]} {e[2]} ・ {e[3]} : {e[4]}  \n"
+        for k, e in info.items())
+    return (f'''
+__kanji details:__ {len(info)}  \n
+{details}''')
+
+
+def flashcards(result):
+    cards = ""
+    for tier in ("furigana", "core", "user", "jmdict"):
+        for e in result.get(tier, {}).get("entries", []):
+            cards += (str(e[0]) + "\t" + str(e[1])
+                      + "\t" + str(e[3]) + "\n")
+    return cards
+
+
+def render_md(result, prefs):
+    ''' the report body, everything below the title '''
+    scheme = url_scheme(prefs["dict"])
+    text = result["text"]
+    grades = result["grades"]
+    kanji_count = result["kanji_count"]
+    kanji_word_list = result["words"]
+    omitted_words = result["omitted"]
+    remaining_words = result["orphans"]
+
+    sieved_text = (f'''
+{text} \n
+__characters in text:__ {result.get("chars", len(text))}
+{_LINE_}
+__kanji in text:__ {result["kanji_total"]}  \n
+__discrete kanji in text:__ {len(kanji_count)} \n
+{pretty(kanji_count)}
+{_LINE_}''')
+    if prefs["kyouiku"] == "1":
+        sieved_text += (f'''
+1.  __第一学年:__ {len(grades[1])}  \n
+  {pretty(grades[1])}  \n
+2.  __第二学年:__ {len(grades[2])}  \n
+  {pretty(grades[2])}  \n
+3.  __第三学年:__ {len(grades[3])}  \n
+  {pretty(grades[3])}  \n
+4.  __第四学年:__ {len(grades[4])}  \n
+  {pretty(grades[4])}  \n
+5.  __第五学年:__ {len(grades[5])}  \n
+  {pretty(grades[5])}  \n
+6.  __第六学年:__ {len(grades[6])}  \n
+  {pretty(grades[6])}  \n
+7.  __中学以上:__ {len(grades[0])}  \n
+  {pretty(grades[0])}  \n
+{_LINE_}''')
+    if result.get("kanji_info"):
+        sieved_text += kanji_md(result["kanji_info"]) + _LINE_
+    sieved_text += (f'''
+__words or word fragments searched in text:__ {len(kanji_word_list)} \n
+{", ".join(map(str, result["listed"]))} \n
+__omitted from search:__ {len(omitted_words)} \n
+{", ".join(map(str, omitted_words))} \n
+{_LINE_}''')
+    if "known" in result:
+        sieved_text += (f'''
+__known to {prefs["reader"]}:__ {len(result["known"])} \n
+{", ".join(map(str, result["known"]))} \n
+__known kanji:__ {len(result["known_kanji"])} of {len(kanji_count)} \n
+{pretty(result["known_kanji"])} \n
+{_LINE_}''')
+    if result.get("window"):
+        from ks_window import window_md
+        sieved_text += window_md(result["window"]) + _LINE_
+    sieved_text += (f'''
+## Glossary  \n
+''')
+    if "furigana" in result:
+        remaining = result["furigana"]["remaining"]
+        sieved_text += (f'''
+### furigana in text  \n
+{tier_md(result, "furigana", scheme)} \n
+__remaining words:__ {len(remaining)}  \n
+{plain(remaining)}
+{_LINE_}''')
+    if prefs["core"] == "1":
+        remaining = result["core"]["remaining"]
+        sieved_text += (f'''
+### Core 6k list  \n
+{tier_md(result, "core", scheme)} \n
+__remaining words:__ {len(remaining)}  \n
+{plain(remaining)}
+{_LINE_}''')
+    if prefs["user"] == "1":
+        remaining = result["user"]["remaining"]
+        sieved_text += (f'''
+### user list  \n
+{tier_md(result, "user", scheme)} \n
+__remaining words:__ {len(remaining)}  \n
+{plain(remaining)}
+{_LINE_}''')
+    if prefs["jmdict"] == "1":
+        sieved_text += (f'''
+### jmdict list  \n
+{tier_md(result, "jmdict", scheme)} \n
+__remaining words:__  {len(remaining_words)}  \n
+{plain(remaining_words)}  \n
+{_LINE_}''')
+    if prefs["orphan"] == "1":
+        sieved_text += (f'''
+{orphan_md(remaining_words, scheme, result.get("near"))}  \n
+''')
+    sieved_text += (f'''
+_generated with [Kanji Sieve {VERSION}](https://github.com/takarabune/kanji_sieve)_
+    ''')
+    return sieved_text
+
+
+# ------------------------------------------------------------------- json
+RESULT_KEYS = ("name", "chars", "kanji_total", "kanji_count", "grades",
+               "listed", "words", "kana_words", "omitted", "known",
+               "known_kanji", "window", "furigana", "core", "user", "jmdict",
+               "orphans", "near", "term_info", "kanji_info")
+
+
+def result_json(result):
+    ''' the parts of a result worth keeping, as json types '''
+    out = {k: result[k] for k in RESULT_KEYS if k in result}
+    out.setdefault("chars", len(result.get("text", "")))
+    out["grades"] = {str(k): v for k, v in out["grades"].items()}
+    return out
+
+
+# prefs that decide what a report shows, besides the links
+ANALYSIS_PREFS = ("dict", "kyouiku", "core", "user", "jmdict", "orphan",
+                  "reader")
+
+
+def save_analysis(result, prefs, path, stamp=None):
+    ''' the result with its text and prefs, to render again later '''
+    data = result_json(result)
+    data["text"] = result["text"]
+    data["time"] = stamp or time.ctime()
+    data["prefs"] = {k: prefs[k] for k in ANALYSIS_PREFS if k in prefs}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    return path
+
+
+def load_analysis(path):
+    ''' (result, prefs) as save_analysis() left them '''
+    with open(path, encoding="utf-8") as f:
+        result = json.load(f)
+    prefs = dict(DEFAULT_PREFS)
+    prefs.update(result.pop("prefs"))
+    # pretty() and the database rows want tuples
+    for key in ("kanji_count", "known_kanji"):
+        if key in result:
+            result[key] = [tuple(i) for i in result[key]]
+    result["grades"] = {int(k): [tuple(i) for i in v]
+                        for k, v in result["grades"].items()}
+    for tier in ("furigana", "core", "user", "jmdict"):
+        if tier in result:
+            result[tier]["entries"] = [tuple(e)
+                                       for e in result[tier]["entries"]]
+    if "term_info" in result:
+        result["term_info"] = {k: tuple(v)
+                               for k, v in result["term_info"].items()}
+    return result, prefs
+
+
+def report_md(result, sieved_text, stamp):
+    ''' the report file: title, time, body '''
+    return ("# " + result["name"]
+            + "  \n_" + stamp
+            + "_  \n\n" + sieved_text)
+
+
+# ----------------------------------------------------------------- saving
+def save_outputs(result, sieved_text, prefs, prof=None):
+    ''' report, flashcards, orphan log and lists -- returns report path '''
+    prof = prof or Profiler()
+    name = result["name"]
+    choice = prefs["dict"]
+    scheme = url_scheme(choice)
+    remaining_words = result["orphans"]
+
+    # ------------------------------------------------------------ save output
+    newdir = "kanji sieve output/"
+    if not os.path.isdir(newdir):
+        os.mkdir(newdir)
+    newpath = unique_path(newdir + name + "_" + choice + "_笊.md")
+    stamp = time.ctime()
+    newtext = report_md(result, sieved_text, stamp) + prof.summary_md()
+    with open(newpath, "w", encoding="utf-8") as newfile:
+        newfile.write(newtext)
+    prof.wrote(newtext)
+    report_path = newpath
+
+    # --------------------------------- the analysis, to render other links
+    save_analysis(result, prefs, os.path.splitext(newpath)[0] + ".json",
+                  stamp)
+
+    # -------------------------------------------------------- save flashcards
+    if prefs["tsv_out"] == "1":
+        newdir = "flashcards output/"
+        if not os.path.isdir(newdir):
+            os.mkdir(newdir)
+        newpath = unique_path(newdir + name + "_flashcards.tsv")
+        newtext = flashcards(result)
+        with open(newpath, "w", encoding="utf-8") as newfile:
+            newfile.write(newtext)
+        prof.wrote(newtext)
+
+    # append to orphans log file
+    newtext = ("\n\n" + name + "  \n"
+               + time.ctime() + "  \n" + orphan_md(remaining_words, scheme))
+    ks_orphans.append_log("kanji sieve output/orphans_log.md", newtext)
+    prof.wrote(newtext)
+    ks_orphans.record(remaining_words, name)
+
+    # ------------------------------------------------------------ orphans csv
+    if prefs["orphan_out"] == "1":
+        if len(remaining_words) > 0:
+            newtext = "\n".join(map(str, remaining_words))
+            with open("kanji sieve output/" + name + "_orphans.csv", "w",
+                      encoding="utf-8") as newfile:
+                newfile.write(newtext)
+            prof.wrote(newtext)
+
+    # ----------------------------------------------------------- last orphans
+    newtext = "\n".join(map(str, remaining_words))
+    with open("data/orphans.ksv", "w", encoding="utf-8") as newfile:
+        newfile.write(newtext)
+    prof.wrote(newtext)
+
+    return report_path
+
+
+def save_metrics(prof, name, report_path):
+    ''' metrics json (and cProfile stats) next to the report '''
+    metrics = prof.metrics()
+    metrics.update({"file": name, "report": str(report_path)})
+    stem = "kanji sieve output/" + name
+    with open(stem + "_metrics.json", "w", encoding="utf-8") as f:
+        json.dump(metrics, f, ensure_ascii=False, indent=1)
+    prof.dump_cprofile(stem + ".prof")
+    return metrics
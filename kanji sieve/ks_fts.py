@@ -0,0 +1,226 @@
+# -----------------------------------------#
+#   ks_fts for Kanji Sieve 1.18
+#   2026-10-19
+#   (c)Robert Belton BSD 3-Clause License
+#
+#
+#   Searching the definitions, english to
+#   japanese: sqlite FTS5 indexes over
+#      core.eng          core_fts
+#      words_en.def      jmdict_fts
+#      user.eng, user.jp user_fts
+#   They index the tables in place (external
+#   content), so dict.db grows by the index
+#   only. The core and jmdict indexes are
+#   built once, on the first search; triggers
+#   keep user_fts in step with the user
+#   table.
+#   A dict.db from ks_compact.py keeps core
+#   and jmdict definitions in one table, the
+#   same indexes then each hold the ids of
+#   their own tier's definitions.
+#   search() ranks the hits of all three by
+#   bm25, the last word of the query taken
+#   as a prefix ("walk str" finds "walk,
+#   stroll"), in milliseconds where LIKE
+#   would read the whole db.
+#   Without FTS5 (an old sqlite) it falls
+#   back to LIKE.
+#
+#   usage (from the kanji sieve folder):
+#      python ks_fts.py <english words>
+#
+#   requires:
+#      data/dict.db
+#
+# -----------------------------------------#
+
+import re
+import sys
+import time
+import sqlite3
+import threading
+import ks_db
+
+LIMIT = 20  # hits per search
+
+# fts table: (statements that create it, the one that fills it)
+INDEXES = {
+    "core_fts": (
+        ("""CREATE VIRTUAL TABLE core_fts USING fts5(
+                eng, content='core', prefix='2 3')""",),
+        "INSERT INTO core_fts(core_fts) VALUES('rebuild')"),
+    "jmdict_fts": (
+        ("""CREATE VIRTUAL TABLE jmdict_fts USING fts5(
+                def, content='words_en', prefix='2 3')""",),
+        "INSERT INTO jmdict_fts(jmdict_fts) VALUES('rebuild')"),
+    "user_fts": (
+        ("""CREATE VIRTUAL TABLE user_fts USING fts5(
+                eng, jp, content='user', prefix='2 3')""",
+         # the user table changes, these keep its index in step
+         """CREATE TRIGGER user_fts_ai AFTER INSERT ON user BEGIN
+                INSERT INTO user_fts(rowid, eng, jp)
+                VALUES (new.rowid, new.eng, new.jp);
+            END""",
+         """CREATE TRIGGER user_fts_ad AFTER DELETE ON user BEGIN
+                INSERT INTO user_fts(user_fts, rowid, eng, jp)
+                VALUES ('delete', old.rowid, old.eng, old.jp);
+            END""",
+         """CREATE TRIGGER user_fts_au AFTER UPDATE ON user BEGIN
+                INSERT INTO user_fts(user_fts, rowid, eng, jp)
+                VALUES ('delete', old.rowid, old.eng, old.jp);
+                INSERT INTO user_fts(rowid, eng, jp)
+                VALUES (new.rowid, new.eng, new.jp);
+            END"""),
+        "INSERT INTO user_fts(user_fts) VALUES('rebuild')"),
+}
+
+# tier: the ranked search
+QUERIES = {
+    "core": """SELECT core.kanji, core.kana, core.eng, bm25(core_fts)
+               FROM core_fts JOIN core ON core.rowid = core_fts.rowid
+               WHERE core_fts MATCH ? ORDER BY bm25(core_fts) LIMIT ?""",
+    # ranked first, then one headword for each definition
+    "jmdict": """SELECT words_jp.kanji, words_jp.reading, words_en.def,
+                        hit.score
+                 FROM (SELECT rowid, bm25(jmdict_fts) AS score
+                       FROM jmdict_fts WHERE jmdict_fts MATCH ?
+                       ORDER BY score LIMIT ?) AS hit
+                 JOIN words_en ON words_en.rowid = hit.rowid
+                 JOIN words_jp ON words_jp.ID = words_en.JPID
+                 GROUP BY hit.rowid ORDER BY hit.score""",
+    "user": """SELECT user.kanji, user.kana,
+                      user.eng || ifnull(', ' || nullif(user.jp, ''), ''),
+                      bm25(user_fts)
+               FROM user_fts JOIN user ON user.rowid = user_fts.rowid
+               WHERE user_fts MATCH ? ORDER BY bm25(user_fts) LIMIT ?""",
+}
+
+# a dict.db rewritten by ks_compact.py: core and jmdict share the defs
+# table, each index holds the definitions of its own tier
+COMPACT_INDEXES = {
+    "core_fts": (
+        ("""CREATE VIRTUAL TABLE core_fts USING fts5(
+                def, content='defs', content_rowid='id', prefix='2 3')""",
+         "CREATE INDEX core_def ON core_keyed(eng_id)"),
+        """INSERT INTO core_fts(rowid, def)
+           SELECT id, def FROM defs
+           WHERE id IN (SELECT eng_id FROM core_keyed)"""),
+    "jmdict_fts": (
+        ("""CREATE VIRTUAL TABLE jmdict_fts USING fts5(
+                def, content='defs', content_rowid='id', prefix='2 3')""",
+         "CREATE INDEX en_def ON en_keyed(def_id)",
+         "CREATE INDEX jp_id ON jp_keyed(id)"),
+        """INSERT INTO jmdict_fts(rowid, def)
+           SELECT id, def FROM defs
+           WHERE id IN (SELECT def_id FROM en_keyed)"""),
+    "user_fts": INDEXES["user_fts"],
+}
+
+COMPACT_QUERIES = {
+    "core": """SELECT c.kanji, c.kana, defs.def, hit.score
+               FROM (SELECT rowid, bm25(core_fts) AS score
+                     FROM core_fts WHERE core_fts MATCH ?
+                     ORDER BY score LIMIT ?) AS hit
+               JOIN defs ON defs.id = hit.rowid
+               JOIN core_keyed AS c ON c.eng_id = hit.rowid
+               ORDER BY hit.score""",
+    "jmdict": """SELECT j.kanji, j.reading, defs.def, hit.score
+                 FROM (SELECT rowid, bm25(jmdict_fts) AS score
+                       FROM jmdict_fts WHERE jmdict_fts MATCH ?
+                       ORDER BY score LIMIT ?) AS hit
+                 JOIN defs ON defs.id = hit.rowid
+                 JOIN en_keyed AS e ON e.def_id = hit.rowid
+                 JOIN jp_keyed AS j ON j.id = e.jpid
+                 GROUP BY hit.rowid ORDER BY hit.score""",
+    "user": QUERIES["user"],
+}
+
+# the same searches without FTS5, unranked
+LIKE_SQL = {
+    "core": """SELECT kanji, kana, eng, 0 FROM core
+               WHERE eng LIKE ? ESCAPE '\\' LIMIT ?""",
+    "jmdict": """SELECT words_jp.kanji, words_jp.reading, words_en.def, 0
+                 FROM words_en JOIN words_jp ON words_jp.ID = words_en.JPID
+                 WHERE words_en.def LIKE ? ESCAPE '\\'
+                 GROUP BY words_en.rowid LIMIT ?""",
+    "user": """SELECT kanji, kana,
+                      eng || ifnull(', ' || nullif(jp, ''), ''), 0
+               FROM user
+               WHERE eng LIKE ? ESCAPE '\\' OR jp LIKE ? ESCAPE '\\'
+               LIMIT ?""",
+}
+
+_lock = threading.Lock()
+_ready = None  # True once the indexes exist, False without FTS5
+_queries = QUERIES
+
+
+def ensure_indexes():
+    ''' build whichever indexes dict.db lacks, True if FTS5 is there '''
+    global _ready, _queries
+    with _lock:
+        if _ready is None:
+            try:
+                with ks_db.transaction() as con:
+                    have = set(row[0] for row in con.execute(
+                        "SELECT name FROM sqlite_master WHERE type='table'"))
+                    indexes = INDEXES
+                    if "defs" in have:
+                        indexes, _queries = COMPACT_INDEXES, COMPACT_QUERIES
+                    for name, (create, fill) in indexes.items():
+                        if name not in have:
+                            for sql in create:
+                                con.execute(sql)
+                            con.execute(fill)
+                _ready = True
+            except sqlite3.OperationalError as e:
+                if "fts5" not in str(e):
+                    raise
+                _ready = False
+    return _ready
+
+
+def match_query(text):
+    ''' FTS5 query for free text: every word must match, the last as
+        a prefix '''
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    return " ".join('"' + w + '"' for w in words) + "*"
+
+
+def search(text, tiers=("user", "core", "jmdict"), limit=LIMIT):
+    ''' [(tier, kanji, kana, definition)] best match first '''
+    if ensure_indexes():
+        query = match_query(text)
+        if query is None:
+            return []
+        hits = []
+        con = ks_db.reader()
+        for order, tier in enumerate(tiers):
+            for row in con.execute(_queries[tier], (query, limit)):
+                hits.append((row[3], order, tier) + tuple(row[:3]))
+        hits.sort(key=lambda hit: hit[:2])
+        return [hit[2:] for hit in hits[:limit]]
+    # no FTS5: a scan per table, % and _ in the text taken as they are
+    like = "%" + re.sub(r"([\\%_])", r"\\\1", text.strip()) + "%"
+    hits = []
+    con = ks_db.reader()
+    for tier in tiers:
+        args = (like, like, limit) if tier == "user" else (like, limit)
+        hits += [(tier,) + tuple(row[:3])
+                 for row in con.execute(LIKE_SQL[tier], args)]
+    return hits[:limit]
+
+
+if __name__ == '__main__':
+    start = time.perf_counter()
+    ensure_indexes()
+    built = time.perf_counter()
+    hits = search(" ".join(sys.argv[1:]))
+    done = time.perf_counter()
+    for tier, kanji, kana, definition in hits:
+        print(f"{tier:7} {kanji}【{kana}】 {definition}")
+    print(f"indexes {(built - start) * 1000:.1f} ms, "
+          f"search {(done - built) * 1000:.1f} ms")
@@ -0,0 +1,233 @@
+# -----------------------------------------#
+#   ks_html for Kanji Sieve 1.18
+#   2026-10-19
+#   (c)Robert Belton BSD 3-Clause License
+#
+#
+#   The report as html, written straight
+#   from the sieve's results -- no markdown
+#   in between.
+#   The page is written to a file piece by
+#   piece, so a novel never has to be one
+#   string in memory.
+#   The source text and each glossary list
+#   fold away (<details>), and long lists
+#   are split into pages of PAGE entries.
+#
+# -----------------------------------------#
+
+from html import escape
+from ks_engine import VERSION, url_scheme
+
+PAGE = 200         # glossary entries per fold
+OPEN_TEXT = 2000   # texts longer than this start folded
+
+HEAD = '''<html>
+<head>
+<meta charset="utf-8" />
+<meta name="viewport" content="width=device-width, initial-scale=1.0, maximum-scale=1.0, user-scalable=yes" />
+<title>{title}</title>
+<style>
+* {{
+        font-size: 16px;
+        font-family: AppleSDGothicNeo-Regular, Helvetica, sans-serif;
+        color: #000000;
+        text-align: left;
+        -webkit-text-size-adjust: none;
+        -webkit-tap-highlight-color: transparent;
+}}
+a {{
+        color: #ff0000;
+        text-decoration: none;
+}}
+h1 {{
+        font-size: larger;
+}}
+h3 {{
+        font-style: bold;
+}}
+code {{
+        font-family: monospace;
+}}
+li {{
+        margin: .4em 0;
+}}
+body {{
+        line-height: 1.5;
+}}
+summary {{
+        font-weight: bold;
+}}
+.text {{
+        white-space: pre-wrap;
+}}
+</style>
+</head>
+<body>
+<div id="content">
+<h1>{title}</h1>
+'''
+TAIL = '''<hr />
+<p><em>generated with <a href="https://github.com/takarabune/kanji_sieve">Kanji Sieve {version}</a></em></p>
+</div>
+</body>
+</html>
+'''
+TEXT = '''<details{open}><summary>text</summary>
+<p class="text">{text}</p>
+</details>
+<p><strong>characters in text:</strong> {chars}</p>
+<hr />
+'''
+COUNT = '''<p><strong>{label}:</strong> {n}<br />
+{items}</p>
+'''
+GRADE = '''<li><strong>{label}:</strong> {n}<br />
+{items}</li>
+'''
+FOLD = '''<details{open}><summary>{summary}</summary>
+'''
+ENTRY = '''<a href="{href}">{word}</a> : 【{kana}】 ({pos}) {eng}<br />
+'''
+USER_ENTRY = '''<a href="{href}">{word}</a> :【{kana}】 ({pos}) {eng}, {jp}<br />
+'''
+ORPHAN = '''<a href="{href}">{word}</a> :{near}<br />
+'''
+NEAR = ''' &asymp; {links}'''
+KANJI_ENTRY = '''{kanji} {strokes}画 部首{radical} {on} ・ {kun} : {meanings}<br />
+'''
+
+LEVELS = ((1, "第一学年"), (2, "第二学年"), (3, "第三学年"), (4, "第四学年"),
+          (5, "第五学年"), (6, "第六学年"), (0, "中学以上"))
+
+TIERS = (("furigana", "furigana in text"), ("core", "Core 6k list"),
+         ("user", "user list"), ("jmdict", "jmdict list"))
+
+
+def _pretty(counts):
+    return escape(" ".join(f"{k}({n})" for k, n in counts))
+
+
+def _plain(words):
+    return escape(", ".join(map(str, words)))
+
+
+def _href(scheme, word, postfix=True):
+    return escape(scheme[0] + str(word) + (scheme[1] if postfix else ""))
+
+
+def _entry(e, tier, scheme):
+    template = USER_ENTRY if tier == "user" else ENTRY
+    fields = {"href": _href(scheme, e[0]), "word": escape(str(e[0])),
+              "kana": escape(str(e[1])), "pos": escape(str(e[2])),
+              "eng": escape(str(e[3]))}
+    if tier == "user":
+        fields["jp"] = escape(str(e[4]))
+    return template.format(**fields)
+
+
+def _orphan(word, near, scheme):
+    # orphan links have no postfix, as in the markdown report
+    links = ", ".join(f'<a href="{_href(scheme, term, False)}">'
+                      f'{escape(term)}</a>' for term in near.get(word, ()))
+    return ORPHAN.format(href=_href(scheme, word, False), word=escape(word),
+                         near=NEAR.format(links=links) if links else "")
+
+
+def _pages(out, label, items, render):
+    ''' items in folds of PAGE, only the first one open '''
+    if not items:
+        out.write(FOLD.format(open="", summary=f"{label} (0)"))
+        out.write("</details>\n")
+        return
+    for start in range(0, len(items), PAGE):
+        page = items[start:start + PAGE]
+        summary = f"{label} ({len(items)})"
+        if len(items) > PAGE:
+            summary = (f"{label} {start + 1}&ndash;{start + len(page)} "
+                       f"of {len(items)}")
+        out.write(FOLD.format(open=" open" if start == 0 else "",
+                              summary=summary))
+        out.write("".join(render(item) for item in page))
+        out.write("</details>\n")
+
+
+def write_html(result, prefs, out):
+    ''' the report, written to the file-like out '''
+    scheme = url_scheme(prefs["dict"])
+    text = result["text"]
+    kanji_count = result["kanji_count"]
+    grades = result["grades"]
+    remaining_words = result["orphans"]
+
+    out.write(HEAD.format(title=escape(result.get("name", ""))))
+    out.write(TEXT.format(open=" open" if len(text) <= OPEN_TEXT else "",
+                          text=escape(text),
+                          chars=result.get("chars", len(text))))
+    out.write(f'<p><strong>kanji in text:</strong> '
+              f'{result["kanji_total"]}</p>\n')
+    out.write(COUNT.format(label="discrete kanji in text",
+                           n=len(kanji_count), items=_pretty(kanji_count)))
+    out.write("<hr />\n")
+    if prefs["kyouiku"] == "1":
+        out.write("<ol>\n")
+        for level, label in LEVELS:
+            out.write(GRADE.format(label=label, n=len(grades[level]),
+                                   items=_pretty(grades[level])))
+        out.write("</ol>\n<hr />\n")
+    if result.get("kanji_info"):
+        _pages(out, "kanji details", list(result["kanji_info"].items()),
+               lambda item: KANJI_ENTRY.format(
+                   kanji=escape(item[0]), strokes=item[1][0],
+                   radical=item[1][1], on=escape(item[1][2]),
+                   kun=escape(item[1][3]), meanings=escape(item[1][4])))
+        out.write("<hr />\n")
+    out.write(COUNT.format(label="words or word fragments searched in text",
+                           n=len(result["words"]),
+                           items=_plain(result["listed"])))
+    out.write(COUNT.format(label="omitted from search",
+                           n=len(result["omitted"]),
+                           items=_plain(result["omitted"])))
+    out.write("<hr />\n")
+    if "known" in result:
+        out.write(COUNT.format(label="known to " + escape(prefs["reader"]),
+                               n=len(result["known"]),
+                               items=_plain(result["known"])))
+        out.write(COUNT.format(
+            label="known kanji",
+            n=f'{len(result["known_kanji"])} of {len(kanji_count)}',
+            items=_pretty(result["known_kanji"])))
+        out.write("<hr />\n")
+    if result.get("window"):
+        from ks_window import sparkline
+        w = result["window"]
+        low = min(w["points"], key=lambda a: a[1])
+        out.write(f'<p><strong>known tokens per {w["window"]} characters:'
+                  f'</strong> {w["overall"]}% overall<br />\n'
+                  f'<strong>hardest window:</strong> {low[1]}% from '
+                  f'character {low[0]}<br />\n'
+                  f'<code>{sparkline(w["points"])}</code></p>\n<hr />\n')
+
+    out.write("<h2>Glossary</h2>\n")
+    for tier, label in TIERS:
+        if prefs.get(tier, "1") != "1" or tier not in result:
+            continue
+        out.write(f"<h3>{label}</h3>\n")
+        _pages(out, "entries", result[tier]["entries"],
+               lambda e, tier=tier: _entry(e, tier, scheme))
+        remaining = result[tier]["remaining"]
+        out.write(COUNT.format(label="remaining words", n=len(remaining),
+                               items=_plain(remaining)))
+        out.write("<hr />\n")
+    if prefs["orphan"] == "1":
+        near = result.get("near") or {}
+        _pages(out, "orphans", remaining_words,
+               lambda w: _orphan(w, near, scheme))
+    out.write(TAIL.format(version=VERSION))
+
+
+def save_html(result, prefs, path):
+    ''' stream the report to path, returns path '''
+    with open(path, "w", encoding="utf-8") as f:
+        write_html(result, prefs, f)
+    return path
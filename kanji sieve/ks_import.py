@@ -0,0 +1,158 @@
+# -----------------------------------------#
+#   ks_import for Kanji Sieve 1.18
+#   2026-10-19
+#   (c)Robert Belton BSD 3-Clause License
+#
+#
+#   Bulk import into the user table.
+#   Reads, in a stream:
+#      .csv        kanji,kana,eng,pos,jp
+#      .tsv .txt   the same, tab separated
+#      .xml .gz    JMdict style entries
+#   A header row naming the columns is
+#   optional. Rows without kanji, kana or
+#   english are skipped, as in the add to
+#   dictionary grid.
+#   An entry with the same kanji and kana is
+#   replaced. The whole file goes in one
+#   transaction, in batches of BATCH rows,
+#   then the user index, the lexicon
+#   snapshot and the orphan store are
+#   brought up to date once.
+#
+#   usage (from the kanji sieve folder):
+#      python ks_import.py <file>
+#
+#   requires:
+#      data/dict.db
+#
+# -----------------------------------------#
+
+import os
+import sys
+import csv
+import gzip
+import time
+import ks_db
+import ks_orphans
+
+BATCH = 5000
+
+COLUMNS = ("kanji", "kana", "eng", "pos", "jp")
+
+USER_INDEX = "CREATE INDEX IF NOT EXISTS user_kanji ON user(kanji, kana)"
+
+
+# ---------------------------------------------------------------- readers
+def read_delimited(path, delimiter=","):
+    ''' rows of a csv or tsv file '''
+    with open(path, encoding="utf-8", newline="") as f:
+        for i, row in enumerate(csv.reader(f, delimiter=delimiter)):
+            if i == 0 and [c.strip().lower() for c in row[:3]] == \
+                    list(COLUMNS[:3]):
+                continue  # header
+            if row and not row[0].startswith("//"):
+                yield row
+
+
+def read_jmdict(path):
+    ''' (kanji, kana, eng, pos, "") for each JMdict <entry> '''
+    import xml.etree.ElementTree as ET
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        events = ET.iterparse(f, ("start", "end"))
+        event, root = next(events)
+        for event, elem in events:
+            if event != "end" or elem.tag != "entry":
+                continue
+            kebs = [e.text for e in elem.iter("keb")]
+            rebs = [e.text for e in elem.iter("reb")]
+            glosses = []
+            pos = []
+            for sense in elem.iter("sense"):
+                glosses += [g.text for g in sense.iter("gloss") if g.text]
+                pos += [p.text for p in sense.iter("pos") if p.text]
+            elem.clear()
+            root.clear()  # the entries read so far, or the tree keeps them
+            if not rebs:
+                continue
+            eng = "; ".join(glosses)
+            pos = ", ".join(dict.fromkeys(pos))
+            for keb in kebs or rebs[:1]:
+                yield (keb, rebs[0], eng, pos, "")
+
+
+def read_rows(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".xml", ".gz"):
+        return read_jmdict(path)
+    if ext in (".tsv", ".txt"):
+        return read_delimited(path, "\t")
+    return read_delimited(path)
+
+
+def validate(rows, rejected=None):
+    ''' (kanji, kana, eng, pos, jp) tuples, stripped, bad rows skipped '''
+    for row in rows:
+        row = [str(c or "").strip() for c in row][:5]
+        row += [""] * (5 - len(row))
+        if (row[0] == "" or row[1] == "" or row[2] == ""
+                or any("\n" in c for c in row)):
+            if rejected is not None:
+                rejected.append(row)
+            continue
+        yield tuple(row)
+
+
+# ----------------------------------------------------------------- import
+def import_rows(rows, rejected=None):
+    ''' upsert rows into the user table in one transaction, returns count '''
+    terms = []
+    batch = []
+    with ks_db.transaction() as con:
+        con.execute(USER_INDEX)
+        for row in validate(rows, rejected):
+            batch.append(row)
+            if len(batch) >= BATCH:
+                terms += [r[0] for r in _upsert(con, batch)]
+                batch = []
+        if batch:
+            terms += [r[0] for r in _upsert(con, batch)]
+    if terms:
+        _refresh(terms)
+    return len(terms)
+
+
+def _upsert(con, batch):
+    # a kanji and kana given twice in one batch: the last row wins
+    batch = list({(r[0], r[1]): r for r in batch}.values())
+    con.executemany("DELETE FROM user WHERE kanji = ? AND kana = ?",
+                    [(r[0], r[1]) for r in batch])
+    con.executemany("INSERT INTO user VALUES(?, ?, ?, ?, ?)", batch)
+    return batch
+
+
+def _refresh(terms):
+    # once per import, not per row
+    ks_db.write("ANALYZE user")
+    import ks_lexicon
+    ks_lexicon.load().add(terms)
+    ks_orphans.resolve(set(terms))
+    ks_db.close_all()
+
+
+def import_file(path, rejected=None):
+    return import_rows(read_rows(path), rejected)
+
+
+if __name__ == '__main__':
+    rejected = []
+    for path in sys.argv[1:]:
+        start = time.perf_counter()
+        n = import_file(path, rejected)
+        print(f"{path}: {n} entries in "
+              f"{time.perf_counter() - start:.1f} s")
+    if rejected:
+        print(f"{len(rejected)} rows skipped (need kanji, kana and english):")
+        for row in rejected[:20]:
+            print("   ", ",".join(row))
@@ -0,0 +1,156 @@
+# -----------------------------------------#
+#   ks_kanjidic for Kanji Sieve 1.18
+#   2026-10-19
+#   (c)Robert Belton BSD 3-Clause License
+#
+#
+#   Readings, meanings, strokes and radical
+#   for each kanji, from KANJIDIC2.
+#   Built once into data/kanji.ksk: arrays
+#   indexed by the kanji's slot (ks_counts),
+#   strokes and radical one byte each, and
+#   offsets into one utf-8 string blob that
+#   holds "on<tab>kun<tab>meanings".
+#   The file is mapped (mmap), not read, and
+#   only when a report first wants it, so a
+#   kanji costs one index, no query and no
+#   parsing.
+#
+#   usage (from the kanji sieve folder):
+#      python ks_kanjidic.py <kanjidic2.xml[.gz]>
+#
+#   will build:
+#      data/kanji.ksk
+#
+# -----------------------------------------#
+
+import os
+import sys
+import gzip
+import mmap
+import struct
+from array import array
+from ks_counts import SLOTS, slot
+
+KANJIDIC_FILE = "data/kanji.ksk"
+
+MAGIC = b"KSK1"
+HEADER = struct.Struct("<4sII")  # magic, slots, blob size
+
+_table = None
+
+
+# ------------------------------------------------------------------ build
+def read_kanjidic(path):
+    ''' (kanji, strokes, radical, on, kun, meanings) per <character> '''
+    import xml.etree.ElementTree as ET
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        for event, elem in ET.iterparse(f):
+            if elem.tag != "character":
+                continue
+            literal = elem.findtext("literal")
+            strokes = elem.findtext("misc/stroke_count") or 0
+            radical = 0
+            for rad in elem.iter("rad_value"):
+                if rad.get("rad_type") == "classical":
+                    radical = rad.text
+            on = [r.text for r in elem.iter("reading")
+                  if r.get("r_type") == "ja_on"]
+            kun = [r.text for r in elem.iter("reading")
+                   if r.get("r_type") == "ja_kun"]
+            # english meanings carry no m_lang
+            meanings = [m.text for m in elem.iter("meaning")
+                        if m.get("m_lang") is None]
+            elem.clear()
+            yield (literal, int(strokes), int(radical), " ".join(on),
+                   " ".join(kun), ", ".join(meanings))
+
+
+def build(rows, path=KANJIDIC_FILE):
+    ''' write the arrays and blob for rows, returns how many kanji '''
+    strokes = bytearray(SLOTS)
+    radicals = bytearray(SLOTS)
+    records = {}
+    for kanji, n, radical, on, kun, meanings in rows:
+        try:
+            s = slot(kanji)
+        except (TypeError, ValueError):
+            continue  # not one of the kanji the sieve counts
+        strokes[s] = min(n, 255)
+        radicals[s] = radical
+        records[s] = "\t".join((on, kun, meanings)).encode("utf-8")
+    offsets = array("I", bytes(4 * (SLOTS + 1)))
+    blob = bytearray()
+    for s in range(SLOTS):
+        offsets[s] = len(blob)
+        blob += records.get(s, b"")
+    offsets[SLOTS] = len(blob)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, SLOTS, len(blob)))
+        f.write(offsets.tobytes())
+        f.write(strokes)
+        f.write(radicals)
+        f.write(blob)
+    os.replace(tmp, path)
+    return len(records)
+
+
+# ------------------------------------------------------------------- read
+class KanjiDic(object):
+    ''' kanji -> (strokes, radical, on, kun, meanings), from the map '''
+
+    def __init__(self, path=KANJIDIC_FILE):
+        self.path = path
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, slots, size = HEADER.unpack_from(self.map)
+        if magic != MAGIC or slots != SLOTS:
+            raise ValueError(path + " is out of date, build it again")
+        view = memoryview(self.map)
+        start = HEADER.size
+        self.offsets = view[start:start + 4 * (slots + 1)].cast("I")
+        start += 4 * (slots + 1)
+        self.strokes = view[start:start + slots]
+        self.radicals = view[start + slots:start + 2 * slots]
+        self.blob = view[start + 2 * slots:start + 2 * slots + size]
+
+    def get(self, kanji):
+        try:
+            s = slot(kanji)
+        except ValueError:
+            return None
+        return self.at(s)
+
+    def at(self, s):
+        ''' the entry for slot s, None if kanjidic has none '''
+        start, end = self.offsets[s], self.offsets[s + 1]
+        if start == end and not self.strokes[s]:
+            return None
+        on, kun, meanings = str(self.blob[start:end], "utf-8").split("\t")
+        return (self.strokes[s], self.radicals[s], on, kun, meanings)
+
+    def __getitem__(self, kanji):
+        entry = self.get(kanji)
+        if entry is None:
+            raise KeyError(kanji)
+        return entry
+
+
+def load(path=KANJIDIC_FILE):
+    ''' the table, mapped on first use, None if it was never built '''
+    global _table
+    if _table is None or _table.path != path:
+        if not os.path.isfile(path):
+            return None
+        _table = KanjiDic(path)
+    return _table
+
+
+if __name__ == '__main__':
+    import time
+    start = time.perf_counter()
+    n = build(read_kanjidic(sys.argv[1]))
+    print(f"{KANJIDIC_FILE}: {n} kanji in "
+          f"{time.perf_counter() - start:.1f} s")
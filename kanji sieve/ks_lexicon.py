@@ -0,0 +1,132 @@
+# -----------------------------------------#
+#   ks_lexicon for Kanji Sieve 1.18
+#   2026-10-19
+#   (c)Robert Belton BSD 3-Clause License
+#
+#
+#   A snapshot of every term the sieve can
+#   look up -- core, user and jmdict
+#   headwords and jmdict readings -- each
+#   with a small integer id.
+#   Ids never change: a refresh only appends
+#   terms that are new, so anything keyed on
+#   them (eg. reader profiles) stays valid.
+#   Appends are made under a file lock after
+#   reading what other sieves appended, so
+#   two processes never give one id to two
+#   terms.
+#
+#   requires:
+#      data/dict.db
+#
+#   will build:
+#      data/lexicon.ksl
+#
+# -----------------------------------------#
+
+import os
+import tempfile
+import ks_db
+from ks_data import _FileLock
+
+LEXICON_FILE = "data/lexicon.ksl"
+LOCK_FILE = "data/.lexicon.lock"
+
+TERM_SQL = """SELECT kanji FROM core
+              UNION SELECT kanji FROM user
+              UNION SELECT kanji FROM words_jp
+              UNION SELECT reading FROM words_jp"""
+
+_lexicon = None
+
+
+class Lexicon(object):
+    ''' term <-> id, ids are line numbers in data/lexicon.ksl '''
+
+    def __init__(self, terms, path=LEXICON_FILE, size=0):
+        self.path = path
+        self.terms = terms
+        self.ids = {term: i for i, term in enumerate(terms)}
+        self.size = size  # bytes of the file read into terms
+
+    def __len__(self):
+        return len(self.terms)
+
+    def __contains__(self, term):
+        return term in self.ids
+
+    def id(self, term):
+        return self.ids.get(term)
+
+    def _read_tail(self):
+        # terms other sieves appended since this one last read the file
+        with open(self.path, "rb") as f:
+            f.seek(self.size)
+            tail = f.read()
+        tail = tail[:tail.rfind(b"\n") + 1]  # whole lines only
+        self.size += len(tail)
+        for term in tail.decode("utf-8").split("\n")[:-1]:
+            self.ids[term] = len(self.terms)
+            self.terms.append(term)
+
+    def add(self, terms):
+        ''' append unseen terms, returns how many were new '''
+        with _FileLock(LOCK_FILE):
+            self._read_tail()
+            new = []
+            for term in terms:
+                if term and "\n" not in term and term not in self.ids:
+                    self.ids[term] = len(self.terms)
+                    self.terms.append(term)
+                    new.append(term)
+            if new:
+                data = "".join(term + "\n" for term in new).encode("utf-8")
+                with open(self.path, "ab") as f:
+                    f.write(data)
+                self.size += len(data)
+        return len(new)
+
+    def refresh(self):
+        ''' pick up terms added to dict.db since the snapshot '''
+        return self.add(dict_terms())
+
+
+def dict_terms():
+    ''' every term dict.db can look up, sorted '''
+    rows = ks_db.reader().execute(TERM_SQL)
+    return sorted(str(row[0]) for row in rows if row[0])
+
+
+def _build(path):
+    # into a temp file first, a failed build leaves no empty lexicon
+    data = "".join(term + "\n" for term in dict_terms()
+                   if "\n" not in term).encode("utf-8")
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".",
+                               prefix=".lexicon.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def load(path=LEXICON_FILE):
+    ''' the snapshot, built from dict.db on first use '''
+    global _lexicon
+    if _lexicon is not None and _lexicon.path == path:
+        return _lexicon
+    if not os.path.isfile(path):
+        ks_db.init_wal()  # dict.db first, it has a lock of its own
+        with _FileLock(LOCK_FILE):
+            # another sieve may have built it while we waited
+            if not os.path.isfile(path):
+                _build(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    data = data[:data.rfind(b"\n") + 1]
+    _lexicon = Lexicon(data.decode("utf-8").split("\n")[:-1], path,
+                       len(data))
+    return _lexicon
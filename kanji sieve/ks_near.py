@@ -0,0 +1,253 @@
+# -----------------------------------------#
+#   ks_near for Kanji Sieve 1.18
+#   2026-10-19
+#   (c)Robert Belton BSD 3-Clause License
+#
+#
+#   Near matches for orphans.
+#   Many orphans are ocr misreads, one kanji
+#   read as a look-alike (末 for 未), and the
+#   word meant is in the dictionary a
+#   character away.
+#   Every lexicon term (see ks_lexicon.py) is
+#   indexed by its character bigrams, the
+#   first and last characters paired with the
+#   word's edges, so 学校 is ^学 学校 校$.
+#   An orphan's suggestions are the terms
+#   sharing the most of its bigrams, ranked
+#   by Dice's coefficient: the index gives
+#   them by set intersection, nothing scans
+#   the lexicon, and a whole orphan list
+#   takes milliseconds. Bigrams in more than
+#   MAX_POSTINGS terms (^お, る$) find no
+#   terms, they only count for the terms the
+#   other bigrams find.
+#   The index is built once for the lexicon
+#   snapshot into data/near.ksn: the bigrams,
+#   and for each the ids of its terms, in
+#   arrays that are mapped (mmap), not read.
+#   Terms the lexicon gains later are indexed
+#   in memory until there are enough of them
+#   to build the file again.
+#
+#   Used when the near pref is 1.
+#
+#   usage (from the kanji sieve folder):
+#      python ks_near.py <words>
+#
+#   requires:
+#      data/dict.db
+#
+#   will build:
+#      data/near.ksn
+#
+# -----------------------------------------#
+
+import os
+import mmap
+import struct
+import tempfile
+from array import array
+from collections import Counter
+import ks_lexicon
+
+NEAR_FILE = "data/near.ksn"
+SUGGESTIONS = 3  # near matches shown for each orphan
+REBUILD = 5000   # terms indexed in memory before the file is built again
+MAX_POSTINGS = 2000  # a bigram in more terms than this finds no candidates
+
+MAGIC = b"KSN1"
+HEADER = struct.Struct("<4sII")  # magic, terms indexed, bigrams
+
+# the word's edges, as characters no term holds
+START, END = "\x02", "\x03"
+
+_index = None
+
+
+def bigrams(word):
+    padded = START + word + END
+    return set(padded[i:i + 2] for i in range(len(padded) - 1))
+
+
+def _postings(terms, first=0):
+    ''' {bigram: array of ids} for terms, ids counted from first '''
+    postings = {}
+    for i, term in enumerate(terms, first):
+        for gram in bigrams(term):
+            ids = postings.get(gram)
+            if ids is None:
+                ids = postings[gram] = array("I")
+            ids.append(i)
+    return postings
+
+
+def build(terms, path=NEAR_FILE):
+    ''' write the index of terms, returns how many bigrams '''
+    postings = _postings(terms)
+    grams = sorted(postings)
+    offsets = array("I", [0])
+    for gram in grams:
+        offsets.append(offsets[-1] + len(postings[gram]))
+    # the last term indexed, to tell this snapshot from a rebuilt one
+    blob = "\n".join([terms[-1] if terms else ""] + grams).encode("utf-8")
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".",
+                               prefix=".near.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(terms), len(grams)))
+            f.write(offsets.tobytes())
+            for gram in grams:
+                f.write(postings[gram].tobytes())
+            f.write(blob)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return len(grams)
+
+
+class NearIndex(object):
+    ''' bigram -> ids of the lexicon terms that hold it '''
+
+    def __init__(self, lexicon, path=NEAR_FILE):
+        self.lexicon = lexicon
+        self.path = path
+        self.map = None
+        if not self._map():
+            build(lexicon.terms, path)
+            self._map()
+        self.update()
+
+    def close(self):
+        ''' let go of the mapped file '''
+        if self.map is not None:
+            # the views hold the map open until they are released
+            self.offsets.release()
+            self.ids.release()
+            self.map.close()
+            self.map = None
+
+    def _map(self):
+        ''' use the file if it indexes a prefix of this lexicon '''
+        self.close()
+        self.slots, self.added = {}, {}
+        self.mapped = self.size = 0
+        if not os.path.isfile(self.path):
+            return False
+        with open(self.path, "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size or header[:len(MAGIC)] != MAGIC:
+                raise ValueError(self.path + " is not a near index, "
+                                 "delete it to build it again")
+            magic, size, count = HEADER.unpack(header)
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # the offsets, then the ids they count, must be in the file
+        start = HEADER.size + 4 * (count + 1)
+        if (len(self.map) < start or len(self.map) < start + 4 *
+                struct.unpack_from("<I", self.map, start - 4)[0]):
+            self.map.close()
+            self.map = None
+            raise ValueError(self.path + " is cut short, "
+                             "delete it to build it again")
+        view = memoryview(self.map)
+        start = HEADER.size
+        self.offsets = view[start:start + 4 * (count + 1)].cast("I")
+        start += 4 * (count + 1)
+        total = self.offsets[count]
+        self.ids = view[start:start + 4 * total].cast("I")
+        lines = str(view[start + 4 * total:], "utf-8").split("\n")
+        terms = self.lexicon.terms
+        if (size > len(terms)
+                or lines[0] != (terms[size - 1] if size else "")):
+            return False  # the lexicon was built again since
+        self.slots = dict(zip(lines[1:], range(count)))
+        self.mapped = self.size = size
+        return True
+
+    def update(self):
+        ''' index terms appended to the lexicon since the last update '''
+        terms = self.lexicon.terms
+        if len(terms) - self.mapped > REBUILD:
+            build(terms, self.path)
+            self._map()
+        for gram, ids in _postings(terms[self.size:], self.size).items():
+            self.added.setdefault(gram, array("I")).extend(ids)
+        self.size = len(terms)
+
+    def _holding(self, gram):
+        ''' (mapped ids, added ids) of the terms that hold gram '''
+        s = self.slots.get(gram)
+        if s is None:
+            return (), self.added.get(gram, ())
+        return (self.ids[self.offsets[s]:self.offsets[s + 1]],
+                self.added.get(gram, ()))
+
+    def suggest(self, word, n=SUGGESTIONS):
+        ''' up to n terms a character or so from word, nearest first '''
+        if len(word) < 2:
+            return []  # a single character shares no bigram when misread
+        grams = bigrams(word)
+        shared = Counter()
+        common = []  # bigrams too many terms hold to count them all
+        for gram in grams:
+            mapped, added = self._holding(gram)
+            if len(mapped) + len(added) > MAX_POSTINGS:
+                common.append(gram)
+                continue
+            shared.update(mapped)
+            shared.update(added)
+        # one character misread costs at most two of the word's bigrams
+        need = max(1, len(grams) - 2)
+        terms = self.lexicon.terms
+        size = len(word)
+        hits = []
+        for i, count in shared.items():
+            if count + len(common) < need:
+                continue
+            term = terms[i]
+            n_term = len(term)
+            if abs(n_term - size) <= 1 and n_term > 1 and term != word:
+                padded = START + term + END
+                count += sum(gram in padded for gram in common)
+                if count >= need:
+                    # a term of n characters has n + 1 bigrams
+                    dice = 2 * count / (len(grams) + n_term + 1)
+                    hits.append((-dice, abs(n_term - size), i))
+        hits.sort()
+        return [terms[i] for d, diff, i in hits[:n]]
+
+    def suggest_all(self, words, n=SUGGESTIONS):
+        ''' {word: [near terms]} for the words that have any '''
+        near = {}
+        for word in words:
+            terms = self.suggest(word, n)
+            if terms:
+                near[word] = terms
+        return near
+
+
+def load():
+    ''' the index over the current lexicon, built once '''
+    global _index
+    lexicon = ks_lexicon.load()
+    if _index is None or _index.lexicon is not lexicon:
+        _index = NearIndex(lexicon)
+    elif _index.size != len(lexicon):
+        _index.update()
+    return _index
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+    start = time.perf_counter()
+    index = load()
+    loaded = time.perf_counter()
+    near = index.suggest_all(sys.argv[1:])
+    done = time.perf_counter()
+    for word in sys.argv[1:]:
+        print(word, "≈", " ".join(near.get(word, [])))
+    print(f"index {(loaded - start) * 1000:.1f} ms, "
+          f"suggestions {(done - loaded) * 1000:.1f} ms")
@@ -0,0 +1,77 @@
+# -----------------------------------------#
+#   ks_normal for Kanji Sieve 1.18
+#   2026-10-19
+#   (c)Robert Belton BSD 3-Clause License
+#
+#
+#   One spelling for what is one word.
+#   ocr, pdfs and web pages write the same
+#   word several ways: ｶﾀｶﾅ for カタカナ,
+#   ＡＢＣ for ABC, the kangxi radical ⼈ or
+#   a compatibility ideograph for the kanji.
+#   Each way would be counted, cached and
+#   looked up on its own, and miss.
+#   fold() maps them to their NFKC form with
+#   one str.translate, from a table built
+#   once at import, so the sieve counts,
+#   segments and looks up the folded text.
+#   The report still shows the text as it
+#   was written.
+#   hiragana() is for the lookups: a kana
+#   word not found as written, eg. ネコ, is
+#   tried as ねこ.
+#
+# -----------------------------------------#
+
+import re
+import unicodedata
+
+# blocks with width and compatibility variants
+FOLD_BLOCKS = (
+    (0x2E80, 0x2FDF),    # cjk and kangxi radicals
+    (0xF900, 0xFAFF),    # cjk compatibility ideographs
+    (0xFF01, 0xFFEE),    # halfwidth and fullwidth forms
+    (0x2F800, 0x2FA1F),  # compatibility ideographs supplement
+)
+
+
+def _fold_table(blocks):
+    table = {}
+    for first, last in blocks:
+        for cp in range(first, last + 1):
+            folded = unicodedata.normalize("NFKC", chr(cp))
+            # one character for one, the text keeps its length
+            if len(folded) == 1 and folded != chr(cp):
+                table[cp] = folded
+    return table
+
+
+FOLD = _fold_table(FOLD_BLOCKS)
+# katakana to hiragana, ァ-ヶ to ぁ-ゖ
+HIRAGANA = {cp: cp - 0x60 for cp in range(0x30A1, 0x30F7)}
+
+# halfwidth ﾞ and ﾟ fold to combining marks, joined to the kana before
+_VOICED = re.compile("[ぁ-ヿ][\u3099\u309a]")
+
+
+def fold(text):
+    ''' text with its width and compatibility variants folded '''
+    text = text.translate(FOLD)
+    if "\u3099" in text or "\u309a" in text:
+        text = _VOICED.sub(
+            lambda m: unicodedata.normalize("NFC", m.group()), text)
+    return text
+
+
+def hiragana(word):
+    return word.translate(HIRAGANA)
+
+
+def kana_variants(words):
+    ''' {hiragana spelling: word} for the words written in katakana '''
+    variants = {}
+    for word in words:
+        variant = hiragana(word)
+        if variant != word:
+            variants[variant] = word
+    return variants
@@ -0,0 +1,156 @@
+# -----------------------------------------#
+#   ks_orphans for Kanji Sieve 1.18
+#   2026-10-19
+#   (c)Robert Belton BSD 3-Clause License
+#
+#
+#   Every word no dictionary table knew,
+#   counted once per term:
+#      how often, in how many documents,
+#      first and last seen, and where.
+#   A sieve adds its orphans in one
+#   transaction. Words added to the user
+#   table are dropped with resolve().
+#
+#   The markdown orphan logs are still
+#   written for reading, but are rotated
+#   when they pass MAX_LOG_BYTES:
+#      orphans_log.md -> orphans_log.1.md ...
+#
+#   will build:
+#      data/orphans.db
+#
+# -----------------------------------------#
+
+import os
+import time
+import sqlite3
+
+ORPHANS_DB = "data/orphans.db"
+
+MAX_LOG_BYTES = 1 << 20  # rotate markdown logs past 1 MB
+KEEP_LOGS = 3            # rotated logs kept
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orphans(
+    term TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    docs INTEGER NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS orphans_by_count ON orphans(count, last_seen);
+CREATE TABLE IF NOT EXISTS orphan_sources(
+    term TEXT NOT NULL,
+    source TEXT NOT NULL,
+    seen REAL NOT NULL,
+    PRIMARY KEY(term, source)) WITHOUT ROWID;
+"""
+
+
+def connect(path=ORPHANS_DB):
+    con = sqlite3.connect(path, timeout=5)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.executescript(SCHEMA)
+    return con
+
+
+def record(terms, source, path=ORPHANS_DB):
+    ''' count one sieve's orphans, in one transaction '''
+    terms = sorted(set(terms))
+    if not terms:
+        return 0
+    now = time.time()
+    con = connect(path)
+    try:
+        with con:
+            # a document sieved again only bumps count, not docs
+            new = set(terms).difference(
+                row[0] for row in con.execute(
+                    "SELECT term FROM orphan_sources WHERE source = ?",
+                    (source,)))
+            con.executemany(
+                """INSERT INTO orphans VALUES(?, 1, ?, ?, ?)
+                   ON CONFLICT(term) DO UPDATE SET count = count + 1,
+                   docs = docs + excluded.docs,
+                   last_seen = excluded.last_seen""",
+                [(term, int(term in new), now, now) for term in terms])
+            con.executemany(
+                """INSERT INTO orphan_sources VALUES(?, ?, ?)
+                   ON CONFLICT(term, source)
+                   DO UPDATE SET seen = excluded.seen""",
+                [(term, source, now) for term in terms])
+    finally:
+        con.close()
+    return len(terms)
+
+
+def resolve(terms, path=ORPHANS_DB):
+    ''' forget terms that now have a dictionary entry '''
+    if not os.path.isfile(path):
+        return
+    con = connect(path)
+    try:
+        with con:
+            con.executemany("DELETE FROM orphans WHERE term = ?",
+                            [(t,) for t in terms])
+            con.executemany("DELETE FROM orphan_sources WHERE term = ?",
+                            [(t,) for t in terms])
+    finally:
+        con.close()
+
+
+# ---------------------------------------------------------------- queries
+def top(n=100, path=ORPHANS_DB):
+    ''' [(term, count, docs)] most frequent first '''
+    if not os.path.isfile(path):
+        return []
+    con = connect(path)
+    try:
+        return con.execute(
+            """SELECT term, count, docs FROM orphans
+               ORDER BY count DESC, last_seen DESC, term LIMIT ?""",
+            (n,)).fetchall()
+    finally:
+        con.close()
+
+
+def info(term, path=ORPHANS_DB):
+    ''' (count, docs, first_seen, last_seen, [sources]) or None '''
+    con = connect(path)
+    try:
+        row = con.execute(
+            """SELECT count, docs, first_seen, last_seen FROM orphans
+               WHERE term = ?""", (term,)).fetchone()
+        if row is None:
+            return None
+        sources = [s for (s,) in con.execute(
+            """SELECT source FROM orphan_sources WHERE term = ?
+               ORDER BY seen""", (term,))]
+        return row + (sources,)
+    finally:
+        con.close()
+
+
+# ------------------------------------------------------------ markdown logs
+def rotate(log_path, max_bytes=None, keep=None):
+    ''' log.md -> log.1.md -> log.2.md ... once log.md is too big '''
+    max_bytes = max_bytes or MAX_LOG_BYTES
+    keep = keep or KEEP_LOGS
+    try:
+        if os.path.getsize(log_path) < max_bytes:
+            return False
+    except OSError:
+        return False
+    stem, ext = os.path.splitext(log_path)
+    for i in range(keep - 1, 0, -1):
+        older = f"{stem}.{i}{ext}"
+        if os.path.exists(older):
+            os.replace(older, f"{stem}.{i + 1}{ext}")
+    os.replace(log_path, f"{stem}.1{ext}")
+    return True
+
+
+def append_log(log_path, text):
+    rotate(log_path)
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write(text)
@@ -0,0 +1,99 @@
+# -----------------------------------------#
+#   ks_paths for Kanji Sieve 1.18
+#   2026-10-19
+#   (c)Robert Belton BSD 3-Clause License
+#
+#
+#   Unique output names:
+#      name.md, name_2.md, name_3.md ...
+#   Each output folder is listed once, and
+#   the highest number used for each name
+#   is kept in memory, so a save is one
+#   open() however many re-runs the folder
+#   holds.
+#   Names are claimed with O_EXCL: a name
+#   another thread or process took first
+#   is skipped, never shared.
+#
+#   Shared by kanji_sieve, generate_glossary
+#   and remove_furigana.
+#
+# -----------------------------------------#
+
+import os
+import re
+import threading
+
+_NUMBERED = re.compile(r"(.*)_(\d+)$")
+
+
+class Allocator(object):
+    ''' claims unique file names, one directory listing per folder '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dirs = {}  # folder: (names, {(stem, ext): highest number})
+
+    def _folder(self, folder):
+        known = self._dirs.get(folder)
+        if known is None:
+            names = set()
+            highest = {}
+            with os.scandir(folder or ".") as entries:
+                for entry in entries:
+                    names.add(entry.name)
+                    stem, ext = os.path.splitext(entry.name)
+                    m = _NUMBERED.match(stem)
+                    if m:
+                        key = (m.group(1), ext)
+                        highest[key] = max(highest.get(key, 1),
+                                           int(m.group(2)))
+            known = self._dirs[folder] = (names, highest)
+        return known
+
+    def _create(self, path):
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            return False
+        os.close(fd)
+        return True
+
+    def claim(self, fn):
+        ''' create and return fn, or the next free fn_<n> '''
+        folder, name = os.path.split(os.fspath(fn))
+        stem, ext = os.path.splitext(name)
+        with self._lock:
+            names, highest = self._folder(os.path.abspath(folder))
+            if name not in names:
+                names.add(name)
+                if self._create(fn):
+                    return os.fspath(fn)
+            while True:
+                # continue after the highest number seen
+                n = highest.get((stem, ext), 1) + 1
+                highest[(stem, ext)] = n
+                uni_fn = os.path.join(folder, f"{stem}_{n}{ext}")
+                names.add(os.path.basename(uni_fn))
+                if self._create(uni_fn):
+                    return uni_fn
+
+    def forget(self, folder=None):
+        ''' list folders again on next use (eg. after files are deleted) '''
+        with self._lock:
+            if folder is None:
+                self._dirs.clear()
+            else:
+                self._dirs.pop(os.path.abspath(folder), None)
+
+
+_allocator = Allocator()
+
+
+def unique_path(fn):
+    ''' a new, empty file named fn, fn_2, fn_3 ... -- returns its path '''
+    return _allocator.claim(fn)
+
+
+def forget(folder=None):
+    _allocator.forget(folder)
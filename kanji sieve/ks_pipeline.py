@@ -0,0 +1,309 @@
+# -----------------------------------------#
+#   ks_pipeline for Kanji Sieve 1.18
+#   2026-10-19
+#   (c)Robert Belton BSD 3-Clause License
+#
+#
+#   Sieves a folder of texts with the
+#   stages overlapped: the next file is read
+#   while earlier ones are segmented in a
+#   worker pool, looked up in batches and
+#   written out.
+#   Stages are threads joined by bounded
+#   queues, so a slow stage holds the others
+#   back instead of filling memory, and a
+#   batch costs about as long as its slowest
+#   stage rather than the sum of them all.
+#
+#   Segmenting runs in worker processes
+#   where the platform has them (not on
+#   iOS), threads otherwise.
+#
+#   usage (from the kanji sieve folder):
+#      python ks_pipeline.py <folder or files>
+#      python ks_pipeline.py --shard <file.kss> <folder or files>
+#   --shard also saves everything sieved as
+#   one SieveResult, to be merged with other
+#   shards by ks_result.py.
+#
+#   Prefs are read from data/kanji_sieve.pref.
+#
+# -----------------------------------------#
+
+import os
+import sys
+import time
+import queue
+import signal
+import threading
+from pathlib import Path
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import ks_db
+import ks_corpus
+from ks_counts import Aggregate
+from ks_result import SieveResult, merge_all
+from ks_profile import Profiler
+from ks_data import ensure_dict_db
+from ks_engine import (analyse, lookup_batch, render_md, save_outputs,
+                       read_prefs)
+
+BATCH = 8   # texts per lookup batch
+DEPTH = 4   # texts waiting between two stages
+
+_DONE = object()
+
+
+def _timed_analyse(text, prefs, readings=None):
+    # runs in the pool, so the time is measured there
+    start = time.perf_counter()
+    result = analyse(text, prefs)
+    if readings:
+        result["readings"] = readings
+    return result, time.perf_counter() - start
+
+
+def _drain(inbox, last):
+    ''' take what is left in inbox after a stage stopped early, so the
+        stage before it is not left blocked on a full queue '''
+    while last is not _DONE:
+        last = inbox.get()
+
+
+def _ignore_sigint():
+    # ctrl-c is for the main process, which finishes the texts in hand;
+    # a worker killed by it would fail them all
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _pool(workers, processes=True):
+    if processes:
+        try:
+            from concurrent.futures import ProcessPoolExecutor
+            import multiprocessing
+            multiprocessing.get_context()
+            return ProcessPoolExecutor(workers, initializer=_ignore_sigint)
+        except (ImportError, NotImplementedError, OSError):
+            pass  # no multiprocessing here (eg. pythonista)
+    return ThreadPoolExecutor(workers)
+
+
+def text_files(paths):
+    ''' the .txt files named or inside the folders named, sorted '''
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files += sorted(path.glob("*.txt"))
+        else:
+            files.append(path)
+    return files
+
+
+class Pipeline(object):
+    ''' read -> analyse (pool) -> lookup (batched) -> write '''
+
+    def __init__(self, prefs=None, workers=None, batch=BATCH, depth=DEPTH,
+                 processes=True, shard=None, prepare=None, on_report=None,
+                 on_error=None, history=None):
+        self.prefs = prefs or read_prefs()
+        self.workers = workers or os.cpu_count() or 2
+        self.batch = batch
+        self.depth = depth
+        self.processes = processes
+        # history bounds these for long runs, eg. ks_watch.py
+        self.reports = deque(maxlen=history)  # (name, report path)
+        self.errors = deque(maxlen=history)   # (name, message)
+        self.sieved = 0
+        self.busy = {}      # stage: Profiler, time spent working
+        self.totals = Aggregate()  # kanji & term counts over every text
+        self.shard = shard         # path to save the merged SieveResult
+        self.shards = []           # a SieveResult per text
+        # text -> text before analysis, or (text, readings from its furigana)
+        self.prepare = prepare
+        self.on_report = on_report  # called with (path, report path)
+        self.on_error = on_error    # called with (path, message)
+        self.files = 0
+
+    def _error(self, path, message):
+        self.errors.append((path.stem, message))
+        if self.on_error:
+            self.on_error(path, message)
+
+    # ------------------------------------------------------------- stages
+    def _read(self, files, out):
+        prof = self.busy["read"]
+        try:
+            for path in files:
+                self.files += 1
+                try:
+                    with prof.stage("read"):
+                        with open(path, encoding="utf-8") as f:
+                            text = f.read()
+                        readings = None
+                        if self.prepare:
+                            text = self.prepare(text)
+                            if isinstance(text, tuple):
+                                text, readings = text
+                except Exception as e:
+                    self._error(path, str(e))
+                    continue
+                # blocks while analyse is behind
+                out.put((path, text, readings))
+        finally:
+            # the stages after this one must still be told when to stop
+            out.put(_DONE)
+
+    def _analyse(self, pool, inbox, out):
+        item = None
+        try:
+            while True:
+                item = inbox.get()
+                if item is _DONE:
+                    break
+                path, text, readings = item
+                try:
+                    future = pool.submit(_timed_analyse, text, self.prefs,
+                                         readings)
+                except Exception as e:  # eg. BrokenProcessPool
+                    self._error(path, str(e))
+                    continue
+                # a bounded queue of futures limits the texts in the pool
+                out.put((path, future))
+        finally:
+            _drain(inbox, item)
+            out.put(_DONE)
+
+    def _lookup(self, inbox, out):
+        prof = self.busy["lookup"]
+        items = [None]
+        try:
+            while items[-1] is not _DONE:
+                items = [inbox.get()]
+                # take whatever else is ready, up to a batch
+                while len(items) < self.batch and items[-1] is not _DONE:
+                    try:
+                        items.append(inbox.get_nowait())
+                    except queue.Empty:
+                        break
+                results = []
+                for item in items:
+                    if item is _DONE:
+                        break
+                    path, future = item
+                    try:
+                        result, seconds = future.result()
+                    except Exception as e:
+                        self._error(path, str(e))
+                        continue
+                    stages = self.busy["analyse"].stages
+                    stages["analyse"] = stages.get("analyse", 0.0) + seconds
+                    result["name"] = path.stem
+                    result["path"] = path
+                    results.append(result)
+                if results:
+                    try:
+                        with prof.stage("lookup"):
+                            lookup_batch(results, self.prefs, prof)
+                    except Exception as e:
+                        for r in results:
+                            self._error(r["path"], str(e))
+                        results = []
+                for result in results:
+                    out.put(result)
+        finally:
+            ks_db.close_all()
+            _drain(inbox, items[-1])
+            out.put(_DONE)
+
+    def _write(self, inbox):
+        prof = self.busy["write"]
+        result = None
+        try:
+            while True:
+                result = inbox.get()
+                if result is _DONE:
+                    break
+                try:
+                    with prof.stage("write"):
+                        sieved_text = render_md(result, self.prefs)
+                        report = save_outputs(result, sieved_text, self.prefs)
+                        if self.prefs.get("corpus", "1") == "1":
+                            ks_corpus.record(result, report)
+                except Exception as e:
+                    self._error(result["path"], str(e))
+                    continue
+                self.reports.append((result["name"], report))
+                self.sieved += 1
+                try:
+                    if self.on_report:
+                        self.on_report(result["path"], report)
+                    self.totals.add_result(result)
+                    if self.shard:
+                        self.shards.append(
+                            SieveResult.from_result(result, self.prefs))
+                except Exception as e:
+                    self._error(result["path"], str(e))
+        finally:
+            _drain(inbox, result)
+
+    # ---------------------------------------------------------------- run
+    def run(self, paths):
+        ''' sieve every text, returns the pipeline's metrics '''
+        return self.stream(text_files(paths))
+
+    def stream(self, files):
+        ''' sieve the paths files yields, as they come -- files can be
+            a generator that waits for more '''
+        ensure_dict_db()
+        self.busy = {s: Profiler(True) for s in
+                     ("read", "analyse", "lookup", "write")}
+        texts = queue.Queue(self.depth)
+        analysed = queue.Queue(max(self.depth, self.workers * 2))
+        found = queue.Queue(self.depth)
+        start = time.perf_counter()
+        with _pool(self.workers, self.processes) as pool:
+            threads = [
+                threading.Thread(target=self._read, args=(files, texts)),
+                threading.Thread(target=self._analyse,
+                                 args=(pool, texts, analysed)),
+                threading.Thread(target=self._lookup, args=(analysed, found)),
+                threading.Thread(target=self._write, args=(found,)),
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        if self.shard:
+            merge_all(self.shards).save(self.shard)
+        total = time.perf_counter() - start
+        return {
+            "files": self.files,
+            "sieved": self.sieved,
+            "errors": list(self.errors),
+            "total_ms": round(total * 1000, 3),
+            "busy_ms": {s: round(p.stages.get(s, 0.0) * 1000, 3)
+                        for s, p in self.busy.items()},
+            "queries": self.busy["lookup"].counters.get("queries", 0),
+            "distinct kanji": self.totals.distinct_kanji(),
+            "distinct terms": len(self.totals.terms),
+        }
+
+
+def sieve_folder(paths, prefs=None, **kw):
+    return Pipeline(prefs, **kw).run(paths)
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    shard = None
+    if args[:1] == ["--shard"]:
+        shard, args = args[1], args[2:]
+    metrics = sieve_folder(args or ["."], shard=shard)
+    print(f'{metrics["sieved"]} of {metrics["files"]} texts sieved '
+          f'in {metrics["total_ms"]:.0f} ms')
+    for stage, ms in metrics["busy_ms"].items():
+        print(f"   {stage:8} {ms:10.1f} ms busy")
+    print(f'{metrics["distinct kanji"]} kanji, '
+          f'{metrics["distinct terms"]} terms in all')
+    for name, message in metrics["errors"]:
+        print("   " + name + ": " + message)
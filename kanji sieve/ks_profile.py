@@ -0,0 +1,123 @@
+# -----------------------------------------#
+#   ks_profile for Kanji Sieve 1.18
+#   2026-10-19
+#   (c)Robert Belton BSD 3-Clause License
+#
+#
+#   Per-stage timers and counters for
+#   the sieve. Timers are context managers,
+#   counters are plain integers.
+#   A disabled Profiler hands back a shared
+#   do-nothing context manager, so leaving
+#   the hooks in place costs next to nothing.
+#
+#   optional:
+#      cProfile capture of a whole sieve
+#
+# -----------------------------------------#
+
+import time
+
+
+class _NullStage(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage(object):
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        stages = self.profiler.stages
+        # repeated stages (eg. several files) are summed
+        stages[self.name] = stages.get(self.name, 0.0) + elapsed
+        return False
+
+
+class Profiler(object):
+    ''' collects stage timings and counters for one sieve '''
+
+    def __init__(self, enabled=False, cprofile=False):
+        self.enabled = enabled
+        self.stages = {}    # name: seconds, in order first entered
+        self.counters = {}  # name: int
+        self._cprofile = None
+        self._started = None
+        if enabled and cprofile:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+
+    def start(self):
+        if self.enabled:
+            self._started = time.perf_counter()
+            if self._cprofile is not None:
+                self._cprofile.enable()
+
+    def stop(self):
+        if self.enabled and self._started is not None:
+            if self._cprofile is not None:
+                self._cprofile.disable()
+            self.total = time.perf_counter() - self._started
+            self._started = None
+
+    def stage(self, name):
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def wrote(self, text):
+        # only pay for the encode when someone is looking
+        if self.enabled:
+            self.count("bytes written", len(text.encode("utf-8")))
+
+    def dump_cprofile(self, path):
+        if self._cprofile is not None:
+            self._cprofile.dump_stats(path)
+            return path
+        return None
+
+    def metrics(self):
+        ''' structured copy of everything collected, json friendly '''
+        total = getattr(self, "total", None)
+        if total is None:
+            total = sum(self.stages.values())
+        return {
+            "total_ms": round(total * 1000, 3),
+            "stages_ms": {name: round(secs * 1000, 3)
+                          for name, secs in self.stages.items()},
+            "counters": dict(self.counters),
+        }
+
+    def summary_md(self):
+        ''' markdown tables of stages and counters for the report '''
+        if not self.enabled:
+            return ""
+        m = self.metrics()
+        total = m["total_ms"] or 1.0
+        out = "\n### profile  \n\n"
+        out += "| stage | ms | % |\n|:---|---:|---:|\n"
+        for name, ms in m["stages_ms"].items():
+            out += f"| {name} | {ms:.1f} | {100 * ms / total:.1f} |\n"
+        out += f"| __total__ | __{m['total_ms']:.1f}__ | |\n\n"
+        if m["counters"]:
+            out += "| counter | value |\n|:---|---:|\n"
+            for name, value in m["counters"].items():
+                out += f"| {name} | {value} |\n"
+        return out
@@ -0,0 +1,163 @@
+# -----------------------------------------#
+#   ks_readers for Kanji Sieve 1.18
+#   2026-10-19
+#   (c)Robert Belton BSD 3-Clause License
+#
+#
+#   Reader profiles: what one learner
+#   already knows.
+#   Known terms are a bitset over lexicon
+#   ids, known kanji a bitset over the
+#   kyouiku grade table, so a profile is a
+#   few tens of kilobytes at most and
+#   checking a word is one bit test.
+#   Known words the lexicon doesn't have
+#   (eg. from an omit file) are kept in the
+#   profile by name, the shared lexicon is
+#   only grown by the dictionary.
+#
+#   Set the 'reader' pref to a profile name
+#   to drop known words before the search.
+#   Start a profile from an omit file with
+#      from_ksv("name", "data/omit.ksv")
+#
+#   will build:
+#      data/readers/<name>.ksr
+#
+# -----------------------------------------#
+
+import os
+import struct
+import ks_lexicon
+from ks_engine import GRADES
+
+READERS_DIR = "data/readers/"
+
+_MAGIC = b"KSR2"
+_HEADER = struct.Struct("<4sIII")  # magic, term, kanji and word bytes
+_HEADER_1 = struct.Struct("<4sII")  # KSR1, no words
+
+# every grade table kanji, in grade order -- index is the kanji's bit
+GRADE_KANJI = "".join(k for level, kyouiku in GRADES for k in kyouiku.split())
+KANJI_IDS = {k: i for i, k in enumerate(GRADE_KANJI)}
+
+
+def _bit(bits, i):
+    return i >> 3 < len(bits) and bits[i >> 3] & (1 << (i & 7))
+
+
+def _set_bit(bits, i):
+    if i >> 3 >= len(bits):
+        bits.extend(bytes((i >> 3) + 1 - len(bits)))
+    bits[i >> 3] |= 1 << (i & 7)
+
+
+class Reader(object):
+    ''' one learner's known terms and kanji '''
+
+    def __init__(self, name, terms=None, kanji=None, words=None):
+        self.name = name
+        self.terms = terms if terms is not None else bytearray()
+        self.kanji = (kanji if kanji is not None
+                      else bytearray((len(GRADE_KANJI) + 7) // 8))
+        self.words = words if words is not None else set()  # not in lexicon
+
+    # ---------------------------------------------------------- learning
+    def know_terms(self, terms, lexicon=None):
+        lexicon = lexicon or ks_lexicon.load()
+        ids = lexicon.ids
+        for term in terms:
+            i = ids.get(term)
+            if i is not None:
+                _set_bit(self.terms, i)
+            elif term and "\n" not in term:
+                self.words.add(term)
+
+    def know_kanji(self, chars):
+        for k in chars:
+            if k in KANJI_IDS:
+                _set_bit(self.kanji, KANJI_IDS[k])
+
+    # ---------------------------------------------------------- checking
+    def knows(self, term, lexicon=None):
+        lexicon = lexicon or ks_lexicon.load()
+        i = lexicon.ids.get(term)
+        if i is None:
+            return term in self.words
+        return bool(_bit(self.terms, i))
+
+    def split_terms(self, terms, lexicon=None):
+        ''' (unknown, known), order kept '''
+        lexicon = lexicon or ks_lexicon.load()
+        ids = lexicon.ids
+        bits = self.terms
+        words = self.words
+        unknown = []
+        known = []
+        for term in terms:
+            i = ids.get(term)
+            if (_bit(bits, i) if i is not None else term in words):
+                known.append(term)
+            else:
+                unknown.append(term)
+        return unknown, known
+
+    def split_kanji(self, kanji_count):
+        ''' (unknown, known) for [(kanji, count)] '''
+        unknown = []
+        known = []
+        for i in kanji_count:
+            k = KANJI_IDS.get(i[0])
+            if k is not None and self.kanji[k >> 3] & (1 << (k & 7)):
+                known.append(i)
+            else:
+                unknown.append(i)
+        return unknown, known
+
+    # ------------------------------------------------------------ storage
+    def save(self, path=None):
+        path = path or READERS_DIR + self.name + ".ksr"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        words = "\n".join(sorted(self.words)).encode("utf-8")
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, len(self.terms), len(self.kanji),
+                                 len(words)))
+            f.write(self.terms)
+            f.write(self.kanji)
+            f.write(words)
+        os.replace(tmp, path)
+        return path
+
+
+def load(name, path=None):
+    ''' a saved profile, or an empty one '''
+    path = path or READERS_DIR + name + ".ksr"
+    if not os.path.isfile(path):
+        return Reader(name)
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:4] == b"KSR1":
+        magic, n_terms, n_kanji = _HEADER_1.unpack_from(data)
+        n_words = 0
+        start = _HEADER_1.size
+    else:
+        magic, n_terms, n_kanji, n_words = _HEADER.unpack_from(data)
+        start = _HEADER.size
+    if magic not in (_MAGIC, b"KSR1"):
+        raise ValueError(path + " is not a reader profile")
+    terms = bytearray(data[start:start + n_terms])
+    start += n_terms
+    kanji = bytearray(data[start:start + n_kanji])
+    start += n_kanji
+    words = data[start:start + n_words].decode("utf-8")
+    return Reader(name, terms, kanji, set(words.split("\n")) - {""})
+
+
+def from_ksv(name, path="data/omit.ksv"):
+    ''' a profile knowing every word in an omit style file '''
+    from ks_engine import load_omits
+    reader = load(name)
+    reader.know_terms(load_omits(path))
+    reader.save()
+    return reader
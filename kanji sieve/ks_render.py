@@ -0,0 +1,61 @@
+# -----------------------------------------#
+#   ks_render for Kanji Sieve 1.18
+#   2026-10-19
+#   (c)Robert Belton BSD 3-Clause License
+#
+#
+#   Reports for other link dictionaries,
+#   without sieving again.
+#   Every report is saved with its analysis
+#   next to it (name_weblio_笊.json beside
+#   name_weblio_笊.md). The links are only
+#   made when a report is rendered, so any
+#   of the dictionaries can be rendered from
+#   the analysis: no segmenting, no lookups.
+#
+#   usage (from the kanji sieve folder):
+#      python ks_render.py <analysis.json> [dict ...]
+#   all six dictionaries if none are named,
+#   --html for html pages as well.
+#
+# -----------------------------------------#
+
+import os
+import sys
+import time
+from ks_paths import unique_path
+from ks_engine import URL_SCHEMES, load_analysis, render_md, report_md
+
+
+def render(result, prefs, choice):
+    ''' the report file's text with choice's links '''
+    prefs = dict(prefs, dict=choice)
+    return report_md(result, render_md(result, prefs), result["time"])
+
+
+def render_variants(path, choices=None, html=False):
+    ''' a report per dictionary beside the analysis, returns the paths '''
+    result, prefs = load_analysis(path)
+    folder = os.path.dirname(path) or "."
+    paths = []
+    for choice in choices or URL_SCHEMES:
+        if choice not in URL_SCHEMES:
+            raise ValueError("unknown dictionary " + repr(choice))
+        stem = os.path.join(folder, result["name"] + "_" + choice + "_笊")
+        out = unique_path(stem + ".md")
+        with open(out, "w", encoding="utf-8") as f:
+            f.write(render(result, prefs, choice))
+        paths.append(out)
+        if html:
+            from ks_html import save_html
+            paths.append(save_html(result, dict(prefs, dict=choice),
+                                   unique_path(stem + ".html")))
+    return paths
+
+
+if __name__ == '__main__':
+    args = [a for a in sys.argv[1:] if a != "--html"]
+    start = time.perf_counter()
+    for p in render_variants(args[0], args[1:], "--html" in sys.argv):
+        print(p)
+    print(f"{(time.perf_counter() - start) * 1000:.1f} ms")
@@ -0,0 +1,322 @@
+# -----------------------------------------#
+#   ks_result for Kanji Sieve 1.18
+#   2026-10-19
+#   (c)Robert Belton BSD 3-Clause License
+#
+#
+#   Sieve results that add up.
+#   A SieveResult holds what a sieve found
+#   as counts and sets, so results from
+#   separate runs (processes, machines,
+#   chapters) merge into one:
+#      a.merge(b).merge(c) == a.merge(b.merge(c))
+#   and render the same report however the
+#   texts were split up: the texts are kept,
+#   joined in order, and so are the offsets
+#   of the word tokens the difficulty window
+#   counts (see ks_window.py). A split can
+#   still cut a word, which then segments as
+#   two, and the known tokens are the ones
+#   each run's prefs and reader knew.
+#   dumps()/loads() give a small binary form
+#   (.kss files) to carry them between runs.
+#
+#   usage (from the kanji sieve folder):
+#      python ks_result.py <name> <file.kss> ...
+#   merges the files and saves one report.
+#
+# -----------------------------------------#
+
+import re
+import sys
+import zlib
+import struct
+import marshal
+from array import array
+import ks_window
+from ks_counts import KanjiCounts, TermCounts, kanji_at
+from ks_normal import hiragana
+from ks_engine import (KANJI, grade_buckets, kanji_info, near_matches,
+                       term_order)
+
+_MAGIC = b"KSS3"
+_HEADER = struct.Struct("<4sI")
+
+TIERS = ("furigana", "core", "user", "jmdict")
+
+
+def _entries(rows, searched):
+    ''' {searched word: row}: jmdict kana hits are found by reading, or
+        by the reading's katakana spelling, eg. スゴイ as すごい '''
+    katakana = {}
+    for word in searched:
+        variant = hiragana(word)
+        if variant != word:
+            katakana.setdefault(variant, []).append(word)
+    entries = {}
+    for row in rows:
+        for key in [row[0], row[1]] + sorted(katakana.get(row[1], ())):
+            if key in searched and key not in entries:
+                entries[key] = tuple(row)
+                break
+    return entries
+
+
+def _first_offsets(text):
+    ''' {kanji: offset of its first appearance in text} '''
+    first = {}
+    for m in re.finditer(KANJI, text):
+        first.setdefault(m.group(), m.start())
+    return first
+
+
+class SieveResult(object):
+    ''' a mergeable summary of one or more sieved texts '''
+
+    def __init__(self):
+        self.names = []
+        self.text = ""   # as written, for the report
+        self.chars = 0
+        self.length = 0  # of the folded text the offsets are in
+        self.kanji = KanjiCounts()
+        self.first = {}  # kanji: first offset in all the texts
+        self.terms = TermCounts()
+        self.listed = set()
+        self.words = set()
+        self.kana_words = set()
+        self.omitted = set()
+        self.known = set()
+        self.known_kanji = set()
+        self.orphans = set()
+        self.reader = False
+        self.info = {}   # term: (count, first offset in all the texts)
+        self.tiers = {}  # tier: ({term: row}, {remaining terms})
+        # word token offsets for the window, if every text kept its tokens
+        self.windowed = True
+        self.starts = array("I")
+        self.known_starts = array("I")
+
+    @classmethod
+    def from_result(cls, result, prefs=None):
+        ''' from an analyse() + lookup() result dict, prefs decide which
+            tokens the window counts as known '''
+        r = cls()
+        r.names = [result.get("name", "")]
+        r.text = result["text"]
+        r.chars = len(result["text"])
+        text = result.get("normal", result["text"])
+        r.length = len(text)
+        r.first = _first_offsets(text)
+        if "kanji_counts" in result:
+            r.kanji = result["kanji_counts"]
+        else:
+            r.kanji = KanjiCounts.from_counter(dict(result["kanji_count"]))
+        if "term_counts" in result:
+            r.terms = result["term_counts"]
+        r.listed = set(result["listed"])
+        r.words = set(result["words"])
+        r.kana_words = set(result["kana_words"])
+        r.omitted = set(result["omitted"])
+        r.reader = "known" in result
+        r.known = set(result.get("known", ()))
+        r.known_kanji = set(k for k, n in result.get("known_kanji", ()))
+        r.orphans = set(result["orphans"])
+        r.info = dict(result.get("term_info", {}))
+        for tier in TIERS:
+            if tier in result:
+                r.tiers[tier] = (_entries(result[tier]["entries"], r.words),
+                                 set(result[tier]["remaining"]))
+        r.windowed = "tokens" in result
+        if r.windowed:
+            r.starts, r.known_starts = ks_window.token_marks(result,
+                                                             prefs or {})
+        return r
+
+    # -------------------------------------------------------------- merge
+    def merge(self, other):
+        ''' a new SieveResult covering both -- associative '''
+        # only some texts have furigana, the tables must agree
+        if (set(self.tiers) - {"furigana"} != set(other.tiers) - {"furigana"}
+                and self.names and other.names):
+            raise ValueError("results were sieved with different tables")
+        m = SieveResult()
+        m.names = self.names + other.names
+        m.text = self.text + other.text
+        m.chars = self.chars + other.chars
+        m.length = self.length + other.length
+        m.kanji = self.kanji.merge(other.kanji)
+        m.terms = self.terms.merge(other.terms)
+        for field in ("listed", "words", "kana_words", "omitted", "known",
+                      "known_kanji", "orphans"):
+            setattr(m, field, getattr(self, field) | getattr(other, field))
+        m.reader = self.reader or other.reader
+        # other's text follows self's, so its offsets move on by self.length
+        m.info = dict(self.info)
+        for term, (count, first) in other.info.items():
+            if term in m.info:
+                m.info[term] = (m.info[term][0] + count, m.info[term][1])
+            else:
+                m.info[term] = (count, self.length + first)
+        m.first = dict(self.first)
+        for kanji, first in other.first.items():
+            m.first.setdefault(kanji, self.length + first)
+        m.windowed = self.windowed and other.windowed
+        if m.windowed:
+            for field in ("starts", "known_starts"):
+                offsets = array("I", getattr(self, field))
+                offsets.extend(self.length + i for i in getattr(other, field))
+                setattr(m, field, offsets)
+        for tier in sorted(set(self.tiers) | set(other.tiers)):
+            entries, remaining = other.tiers.get(tier, ({}, set()))
+            entries = dict(entries)
+            mine = self.tiers.get(tier, ({}, set()))
+            entries.update(mine[0])  # the earlier result's row wins
+            m.tiers[tier] = (entries, mine[1] | remaining)
+        return m
+
+    # ---------------------------------------------------------- rendering
+    def kanji_count(self):
+        ''' [(kanji, count)] most used first, ties in the order they
+            appear, as analyse() gives them '''
+        pairs = [(kanji_at(s), n)
+                 for s, n in zip(self.kanji.slots, self.kanji.counts)]
+        first = self.first
+        return sorted(pairs, key=lambda a: (-a[1],
+                                            first.get(a[0], self.length)))
+
+    def to_result(self, name=None, text=None, prefs=None):
+        ''' a result dict for render_md(), flashcards() and save_outputs(),
+            terms in the order the order pref asks for '''
+        prefs = prefs or {}
+        kanji_count = self.kanji_count()
+        info = dict(self.info)
+        for term in self.listed.difference(info):
+            info[term] = (0, self.length)  # from a result without term info
+        key = term_order(prefs, info)
+
+        def ordered(terms):
+            return sorted(terms, key=key)
+
+        result = {
+            "name": name if name is not None else "+".join(self.names),
+            "text": self.text if text is None else text,
+            "chars": self.chars,
+            "kanji_total": self.kanji.total(),
+            "kanji_count": kanji_count,
+            "grades": grade_buckets(kanji_count),
+            "listed": ordered(self.listed),
+            "words": ordered(self.words),
+            "kana_words": ordered(self.kana_words),
+            "omitted": ordered(self.omitted),
+            "orphans": ordered(self.orphans),
+            "term_info": info,
+            "kanji_counts": self.kanji,
+            "term_counts": self.terms,
+        }
+        info = kanji_info(kanji_count, prefs)
+        if info:
+            result["kanji_info"] = info
+        near = near_matches(result["orphans"], prefs)
+        if near:
+            result["near"] = near
+        if self.reader:
+            result["known"] = ordered(self.known)
+            result["known_kanji"] = [i for i in kanji_count
+                                     if i[0] in self.known_kanji]
+        size = ks_window.window_size(prefs)
+        if size > 0 and self.windowed:
+            result["window"] = ks_window.scores(self.length, self.starts,
+                                                self.known_starts, size)
+        for tier, (entries, remaining) in self.tiers.items():
+            result[tier] = {"entries": [entries[k] for k in ordered(entries)],
+                            "remaining": ordered(remaining)}
+        return result
+
+    # -------------------------------------------------------------- bytes
+    def dumps(self):
+        ''' the same result always gives the same bytes '''
+        terms = sorted(self.terms.items())
+        body = marshal.dumps((
+            self.names, self.text, self.chars, self.length,
+            self.kanji.slots.tobytes(), self.kanji.counts.tobytes(),
+            sorted(self.first.items()),
+            tuple(t for t, n in terms),
+            array("I", (n for t, n in terms)).tobytes(),
+            sorted(self.listed), sorted(self.words), sorted(self.kana_words),
+            sorted(self.omitted), sorted(self.known),
+            sorted(self.known_kanji), sorted(self.orphans),
+            self.reader, sorted(self.info.items()),
+            [(tier, sorted(entries.items()), sorted(remaining))
+             for tier, (entries, remaining) in sorted(self.tiers.items())],
+            self.windowed, self.starts.tobytes(),
+            self.known_starts.tobytes()),
+            2)  # no back references, so no dependence on object identity
+        return _HEADER.pack(_MAGIC, len(body)) + zlib.compress(body)
+
+    @classmethod
+    def loads(cls, data):
+        magic, size = _HEADER.unpack_from(data)
+        if magic in (b"KSS1", b"KSS2"):
+            raise ValueError("saved by an older version, sieve again")
+        if magic != _MAGIC:
+            raise ValueError("not a sieve result")
+        (names, text, chars, length, slots, counts, first, terms, term_counts,
+         listed, words, kana_words, omitted, known, known_kanji, orphans,
+         reader, info, tiers, windowed, starts,
+         known_starts) = marshal.loads(zlib.decompress(data[_HEADER.size:]))
+        r = cls()
+        r.names = list(names)
+        r.text = text
+        r.chars = chars
+        r.length = length
+        r.kanji = KanjiCounts(array("I", slots), array("I", counts))
+        r.first = dict(first)
+        r.terms = TermCounts(terms, array("I", term_counts))
+        r.listed = set(listed)
+        r.words = set(words)
+        r.kana_words = set(kana_words)
+        r.omitted = set(omitted)
+        r.known = set(known)
+        r.known_kanji = set(known_kanji)
+        r.orphans = set(orphans)
+        r.reader = reader
+        r.info = dict(info)
+        r.tiers = {tier: (dict(entries), set(remaining))
+                   for tier, entries, remaining in tiers}
+        r.windowed = windowed
+        r.starts = array("I", starts)
+        r.known_starts = array("I", known_starts)
+        return r
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.dumps())
+        return path
+
+
+def load(path):
+    with open(path, "rb") as f:
+        return SieveResult.loads(f.read())
+
+
+def _merge_pair(pair):
+    return pair[0].merge(pair[1]) if len(pair) == 2 else pair[0]
+
+
+def merge_all(results):
+    ''' reduce SieveResults in order, pairwise so no set is copied often '''
+    results = list(results)
+    if not results:
+        return SieveResult()
+    while len(results) > 1:
+        results = [_merge_pair(results[i:i + 2])
+                   for i in range(0, len(results), 2)]
+    return results[0]
+
+
+if __name__ == '__main__':
+    from ks_engine import read_prefs, render_md, save_outputs
+    prefs = read_prefs()
+    merged = merge_all(load(path) for path in sys.argv[2:])
+    result = merged.to_result(sys.argv[1], prefs=prefs)
+    print(save_outputs(result, render_md(result, prefs), prefs))
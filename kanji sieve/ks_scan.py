@@ -0,0 +1,108 @@
+# -----------------------------------------#
+#   ks_scan for Kanji Sieve 1.18
+#   2026-10-19
+#   (c)Robert Belton BSD 3-Clause License
+#
+#
+#   Segmenting by the dictionary itself.
+#   Instead of tinysegmenter's guesses the
+#   text is scanned once, left to right, for
+#   the longest term in the lexicon (every
+#   core, user and jmdict headword and jmdict
+#   reading, see ks_lexicon.py) starting at
+#   each point. Characters no term covers are
+#   segments of their own, runs of kanji kept
+#   together, so the segments still join back
+#   into the text.
+#   The lexicon's dict is the index: a table
+#   of the longest term for each first
+#   character bounds how far each probe
+#   looks, so a scan costs about the text's
+#   length times the usual word length.
+#   Katakana is also tried as hiragana, so
+#   ネコ is found as ねこ would be.
+#   Every hit is a lexicon term, so terms the
+#   scan could not match need no queries.
+#   Hits are lexicon ids, not dictionary
+#   entries: their rows are still fetched by
+#   the lookup's IN queries, one per table.
+#
+#   Used when the segmenter pref is lexicon.
+#
+# -----------------------------------------#
+
+import re
+import ks_lexicon
+from ks_normal import hiragana
+from ks_engine import KANJI
+
+# what no term covers: a run of kanji, or any one character
+_LEFTOVER = re.compile(KANJI + "+|.", re.S)
+
+_scanner = None
+
+
+def _leftovers(run):
+    return [(segment, None) for segment in _LEFTOVER.findall(run)]
+
+
+class Scanner(object):
+    ''' longest-match segmenting over a Lexicon '''
+
+    def __init__(self, lexicon):
+        self.lexicon = lexicon
+        self.longest = {}  # first character: length of its longest term
+        self.size = 0
+        self.update()
+
+    def update(self):
+        ''' index terms appended to the lexicon since the last update '''
+        longest = self.longest
+        terms = self.lexicon.terms
+        for term in terms[self.size:]:
+            if term and len(term) > longest.get(term[0], 0):
+                longest[term[0]] = len(term)
+        self.size = len(terms)
+
+    def scan(self, text):
+        ''' [(segment, lexicon id or None)], the segments join into text '''
+        ids = self.lexicon.ids
+        longest = self.longest
+        kana = hiragana(text)  # same length, katakana as hiragana
+        out = []
+        unmatched = 0  # start of the run no term covers
+        i = 0
+        end = len(text)
+        while i < end:
+            n = min(max(longest.get(text[i], 0), longest.get(kana[i], 0)),
+                    end - i)
+            while (n and text[i:i + n] not in ids
+                   and kana[i:i + n] not in ids):
+                n -= 1
+            if n:
+                if unmatched < i:
+                    out += _leftovers(text[unmatched:i])
+                term = text[i:i + n]
+                out.append((term, ids.get(term, ids.get(kana[i:i + n]))))
+                i += n
+                unmatched = i
+            else:
+                i += 1
+        if unmatched < end:
+            out += _leftovers(text[unmatched:])
+        return out
+
+    def tokenize(self, text):
+        ''' segments, as tinysegmenter.tokenize() gives them '''
+        return [segment for segment, i in self.scan(text)]
+
+
+def load():
+    ''' the scanner over the current lexicon, built once '''
+    global _scanner
+    lexicon = ks_lexicon.load()
+    if _scanner is None or _scanner.lexicon is not lexicon:
+        _scanner = Scanner(lexicon)
+    elif _scanner.size != len(lexicon):
+        _scanner.update()
+    return _scanner
@@ -0,0 +1,215 @@
+# -----------------------------------------#
+#   ks_watch for Kanji Sieve 1.18
+#   2026-10-19
+#   (c)Robert Belton BSD 3-Clause License
+#
+#
+#   Sieves the text files dropped into one
+#   or more folders, eg. by a scanner's ocr,
+#   until stopped (ctrl-c).
+#   The folders are scanned every INTERVAL
+#   seconds. A file is only taken once its
+#   size and time are unchanged between two
+#   scans and SETTLE seconds old, so files
+#   still being written are left alone.
+#   Each file has its furigana removed, their
+#   readings kept for the lookups, and is
+#   sieved by the pipeline (ks_pipeline.py),
+#   whose bounded queues and worker pool keep
+#   memory flat however many files arrive.
+#   Finished inputs are kept in a ledger by
+#   content hash: after a restart, or when
+#   the same text is dropped again, nothing
+#   is sieved twice. Files that fail are kept
+#   too, and only retried once they change.
+#
+#   usage (from the kanji sieve folder):
+#      python ks_watch.py [--keep-furigana] <folder> ...
+#
+#   will build:
+#      data/watch.db
+#
+# -----------------------------------------#
+
+import os
+import sys
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from ks_pipeline import Pipeline
+from remove_furigana import harvest_furigana
+
+LEDGER_DB = "data/watch.db"
+
+INTERVAL = 2.0   # seconds between scans
+SETTLE = 3.0     # seconds a file must be unchanged
+HISTORY = 1000   # reports and errors the pipeline remembers
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS inputs(
+    hash TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    status TEXT NOT NULL,
+    report TEXT NOT NULL,
+    finished REAL NOT NULL) WITHOUT ROWID;
+"""
+
+
+def digest(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class Ledger(object):
+    ''' inputs already sieved (or failed), by content hash '''
+
+    def __init__(self, path=LEDGER_DB):
+        self.lock = threading.Lock()
+        self.con = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self.con.execute("PRAGMA journal_mode=WAL")
+        self.con.executescript(SCHEMA)
+
+    def __contains__(self, digest):
+        with self.lock:
+            return self.con.execute("SELECT 1 FROM inputs WHERE hash = ?",
+                                    (digest,)).fetchone() is not None
+
+    def record(self, digest, path, status, report):
+        ''' status is "done" (report is its path) or "error" (the message) '''
+        with self.lock, self.con:
+            self.con.execute(
+                """INSERT OR REPLACE INTO inputs VALUES(?, ?, ?, ?, ?)""",
+                (digest, str(path), status, str(report), time.time()))
+
+    def close(self):
+        with self.lock:
+            self.con.close()
+
+
+class Taken(type(Path())):
+    ''' a path as it was taken, with the hash of what it held then: the
+        pipeline hands the same object to the callbacks, so a file
+        rewritten while in flight is two items, not one '''
+    digest = None
+
+
+class Watcher(object):
+    ''' yields new, settled .txt files from folders until stop() '''
+
+    def __init__(self, folders, ledger, interval=INTERVAL, settle=SETTLE):
+        self.folders = [Path(f) for f in folders]
+        self.ledger = ledger
+        self.interval = interval
+        self.settle = settle
+        self.changing = {}  # path: (size, mtime) at the last scan
+        self.handled = {}   # path: (size, mtime) when it was taken
+        self.hashes = set()  # of the files taken but not finished
+        self.stopped = threading.Event()
+
+    def stop(self):
+        self.stopped.set()
+
+    def scan(self):
+        ''' the files settled since the last scan '''
+        now = time.time()
+        present = set()
+        ready = []
+        for folder in self.folders:
+            try:
+                entries = list(os.scandir(folder))
+            except OSError:
+                continue  # not there (yet)
+            for entry in entries:
+                if entry.name.startswith(".") or not (
+                        entry.name.endswith(".txt") and entry.is_file()):
+                    continue
+                path = Path(entry.path)
+                present.add(path)
+                st = entry.stat()
+                sig = (st.st_size, st.st_mtime_ns)
+                if self.handled.get(path) == sig:
+                    continue
+                if (self.changing.get(path) == sig
+                        and now - st.st_mtime >= self.settle):
+                    del self.changing[path]
+                    self.handled[path] = sig
+                    ready.append(path)
+                else:
+                    self.changing[path] = sig
+        # forget files that were moved away, so memory stays bounded
+        for seen in (self.changing, self.handled):
+            for path in [p for p in seen if p not in present]:
+                del seen[path]
+        return sorted(ready)
+
+    def __iter__(self):
+        while not self.stopped.is_set():
+            for path in self.scan():
+                try:
+                    h = digest(path)
+                except OSError:
+                    continue
+                if h in self.hashes or h in self.ledger:
+                    continue
+                taken = Taken(path)
+                taken.digest = h
+                self.hashes.add(h)
+                yield taken
+            self.stopped.wait(self.interval)
+
+    # --------------------------------------------------- pipeline callbacks
+    def finished(self, path, report):
+        print(path.name + " -> " + str(report))
+        self.ledger.record(path.digest, path, "done", report)
+        self.hashes.discard(path.digest)
+
+    def failed(self, path, message):
+        print(path.name + ": " + message)
+        if path.digest is not None:
+            self.ledger.record(path.digest, path, "error", message)
+            self.hashes.discard(path.digest)
+
+
+def watch(folders, prefs=None, keep_furigana=False, interval=INTERVAL,
+          settle=SETTLE, **kw):
+    ''' sieve what arrives in folders until ctrl-c, returns the metrics '''
+    ledger = Ledger()
+    watcher = Watcher(folders, ledger, interval, settle)
+    # the furigana's readings are kept for the lookups
+    prepare = None if keep_furigana else harvest_furigana
+    pipeline = Pipeline(prefs, prepare=prepare, on_report=watcher.finished,
+                        on_error=watcher.failed, history=HISTORY, **kw)
+    metrics = {}
+    done = threading.Event()
+
+    def run():
+        try:
+            metrics.update(pipeline.stream(iter(watcher)))
+        finally:
+            done.set()
+
+    threading.Thread(target=run).start()
+    try:
+        # an event, not join(): a join cut short by ctrl-c can lose track
+        while not done.wait(0.5):
+            pass
+    except KeyboardInterrupt:
+        print("stopping, finishing the files in hand ...")
+    watcher.stop()
+    done.wait()
+    ledger.close()
+    return metrics
+
+
+if __name__ == '__main__':
+    args = [a for a in sys.argv[1:] if a != "--keep-furigana"]
+    print("watching " + ", ".join(args or ["."]) + " (ctrl-c to stop)")
+    metrics = watch(args or ["."],
+                    keep_furigana="--keep-furigana" in sys.argv)
+    print(f'{metrics.get("sieved", 0)} of {metrics.get("files", 0)} '
+          f'texts sieved')
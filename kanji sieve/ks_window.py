@@ -0,0 +1,153 @@
+# -----------------------------------------#
+#   ks_window for Kanji Sieve 1.18
+#   2026-10-19
+#   (c)Robert Belton BSD 3-Clause License
+#
+#
+#   Where in a text the difficulty sits.
+#   The percentage of known tokens in a
+#   window of characters (500 by default)
+#   sliding through the text.
+#   Token counts are kept as prefix sums
+#   over character positions, so each window
+#   is two subtractions however large it is.
+#
+#   Tokens are judged as the word lists
+#   have them, after data/sub.ksv. A token
+#   is known if it is omitted or known to
+#   the reader profile, or else if all its
+#   kanji are known (reader profile, or the
+#   kyouiku grades up to the 'known_grade'
+#   pref, 6 when unset). Kana only tokens
+#   are known, particles and endings, but
+#   for the kana words the sieve lists,
+#   which are known only when omitted or
+#   known to the reader profile.
+#
+# -----------------------------------------#
+
+import re
+from array import array
+from itertools import accumulate
+from ks_engine import GRADES, KANJI as KANJI_CHAR, WORD_CHAR, load_subs
+
+WORD = re.compile(WORD_CHAR)
+KANJI = re.compile(KANJI_CHAR)
+
+BARS = "▁▂▃▄▅▆▇█"
+
+
+def marks(text, tokens, is_known):
+    ''' (starts, known starts): offsets in text of the word tokens, and
+        of those that are known '''
+    starts = array('I')
+    known = array('I')
+    pos = 0
+    for token in tokens:
+        i = text.find(token, pos)
+        if i < 0:
+            continue
+        pos = i + len(token)
+        if WORD.search(token) is None:
+            continue  # punctuation, spaces, latin
+        starts.append(i)
+        if is_known(token):
+            known.append(i)
+    return starts, known
+
+
+def prefix_sums(length, starts, known):
+    ''' (all, known) token counts before each character position '''
+    sums = []
+    for offsets in (starts, known):
+        at = bytearray(length + 1)
+        for i in offsets:
+            at[i + 1] = 1
+        sums.append(array('I', accumulate(at)))
+    return tuple(sums)
+
+
+def curve(sums, size=500, step=None):
+    ''' [(offset, percent known)] for each window '''
+    total, known = sums
+    n = len(total) - 1
+    step = step or max(1, size // 5)
+    out = []
+    for start in range(0, max(1, n - size + step), step):
+        end = min(start + size, n)
+        tokens = total[end] - total[start]
+        if tokens:
+            pct = 100.0 * (known[end] - known[start]) / tokens
+        else:
+            pct = 100.0
+        out.append((start, round(pct, 1)))
+    return out
+
+
+def known_test(result, prefs):
+    ''' is_known(token) from the omit list, reader profile and grades '''
+    subs = load_subs()  # the words were listed substituted
+    known_words = set(result.get("omitted", [])) | set(result.get("known", []))
+    kana_words = set(result.get("kana_words", []))
+    if "known_kanji" in result:
+        known_kanji = set(k for k, n in result["known_kanji"])
+    else:
+        grade = int(prefs.get("known_grade", "6") or 0)
+        known_kanji = set(k for level, kyouiku in GRADES
+                          if level <= grade for k in kyouiku.split())
+
+    def is_known(token):
+        term = subs.get(token, token)
+        if term in known_words or term == "x":  # x: dropped from the lists
+            return True
+        kanji = KANJI.findall(term)
+        if not kanji:
+            return term not in kana_words
+        return all(k in known_kanji for k in kanji)
+    return is_known
+
+
+def token_marks(result, prefs):
+    ''' marks() of a sieved text's tokens '''
+    text = result.get("normal", result["text"])  # the tokens' text
+    return marks(text, result["tokens"], known_test(result, prefs))
+
+
+def scores(length, starts, known, size=500):
+    ''' the curve and overall percentage from marks() '''
+    total, known = prefix_sums(length, starts, known)
+    return {
+        "window": size,
+        "points": curve((total, known), size),
+        "overall": round(100.0 * known[-1] / total[-1], 1) if total[-1]
+                   else 100.0,
+    }
+
+
+def window_size(prefs):
+    ''' characters per window, 0 when the window pref is off '''
+    return int(prefs.get("window", "0") or 0)
+
+
+def score(result, prefs):
+    ''' the difficulty curve of a sieved text '''
+    size = window_size(prefs)
+    if size <= 0 or "tokens" not in result:
+        return None
+    length = len(result.get("normal", result["text"]))
+    return scores(length, *token_marks(result, prefs), size)
+
+
+def sparkline(points):
+    return "".join(BARS[min(len(BARS) - 1, int(p * len(BARS) / 100))]
+                   for start, p in points)
+
+
+def window_md(scores):
+    points = scores["points"]
+    low = min(points, key=lambda a: a[1])
+    return (f'''
+__known tokens per {scores["window"]} characters:__ {scores["overall"]}% overall  \n
+__hardest window:__ {low[1]}% from character {low[0]}  \n
+`{sparkline(points)}`  \n
+''')
@@ -1,170 +1,181 @@
 ### ---------------------------------------------------###
-#   Remove Furigana 1.03
-#   2023-11-22
+#   Remove Furigana 1.04
+#   2026-10-19
 #   Robert Belton
 #
-#   Takes text with furigana from the output of ocr 
+#   Takes text with furigana from the output of ocr
 #   and strips out the furigana.
 #   It accepts input from the clipboard or a file.
-#   It strips linebreaks but tries to preserve 
+#   It strips linebreaks but tries to preserve
 #   paragraph breaks.
 #   It processes line by line. Furigana line defined
 #   as a line without Kanji or punctuation or longer
-#   than the average line width.   
+#   than the average line width.
+#   strip_furigana() does the work on a string, for
+#   the command line see ks_cli.py.
+#   harvest_furigana() also keeps what the furigana
+#   said: each furigana line is lined up with the
+#   kanji in the line after it, giving a reading
+#   for each kanji word, eg. {"憂鬱": "ゆううつ"}.
 #
 ### ---------------------------------------------------###
 
 import sys
 import os
 import re
-import dialogs
-import clipboard
+import io
+import math
 import statistics
 from pathlib import Path
-from datetime import datetime
+from ks_paths import unique_path
 
 ##### jp_regex #####
 
-kanji = r'[㐀-䶵一-鿋豈-頻]'
+kanji = ('[\u3005\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+         '\U00020000-\U0002a6df\U0002a700-\U0002ebef'
+         '\U0002f800-\U0002fa1f\U00030000-\U0003134f]')
 symbols_punct = r'[、-〿]'
+kana_word = r'[ぁ-ゖァ-ヺー]+'
 
 def extract_unicode_block(unicode_block, string):
     return re.findall(unicode_block, string)
 
 #### end jp_regex ####
 
-def add_unique_postfix(fn):
-    if not os.path.exists(fn):
-        return fn
 
-    path, name = os.path.split(fn)
-    name, ext = os.path.splitext(name)
+def ruby_pairs(ruby, line):
+    ''' [(kanji, reading)], the readings of a furigana line matched in
+        order to the kanji runs of the line below it '''
+    groups = [(m.group(), m.start() + m.end()) for m in
+              re.finditer(r"\S+", ruby)]  # text, twice its middle column
+    if not groups or any(re.fullmatch(kana_word, g) is None
+                         for g, mid in groups):
+        return []
+    runs = [(m.group(), m.start() + m.end()) for m in
+            re.finditer(kanji + "+", line)]
+    if len(groups) > len(runs):
+        return []
+    # not every run has furigana: each reading goes over a run it could
+    # fit (one to three kana a kanji), as near its middle as the order
+    # allows. best[j]: (distance, pairs) for the groups so far, first j runs
+    best = [(0, [])] * (len(runs) + 1)
+    for group, mid in groups:
+        last, best = best, [(math.inf, [])]
+        for j, (run, run_mid) in enumerate(runs):
+            take = (math.inf, [])
+            if (last[j][0] < math.inf
+                    and len(run) <= len(group) <= 3 * len(run)):
+                take = (last[j][0] + abs(mid - run_mid),
+                        last[j][1] + [(run, group)])
+            best.append(min(best[-1], take, key=lambda a: a[0]))
+    return best[-1][1]
+
+
+def strip_furigana(text, readings=None):
+    ''' text without its furigana lines, paragraph breaks kept,
+        the readings they gave go in the readings dict if there is one '''
+    # read as a file would be, \r\n and \r become \n
+    lines = list(io.StringIO(text, newline=None))
+    if not lines:
+        return ""
+    # analyse line lengths
+    line_length = sorted(len(line.replace(" ", "").strip())
+                         for line in lines)
+    x = int(4 * len(line_length)/5)
+    top20_lines = line_length[x:]
+    y = statistics.mode(top20_lines)
+    z = 4 # magic number, used to determine lines likely to be paragraph returns.
+
+    new_text = []
+    ruby = None
+    for line in lines:
+        # discard furigana
+        if (extract_unicode_block(kanji, line) != [] or
+            extract_unicode_block(symbols_punct, line) != [] or
+            len(line.replace(" ", "").strip()) >= y - 2):
+             # if line has kanji or punctuation it is not furigana
+             if  (y - z) >= len(line.strip()) :
+                 new_text.append(line)  #retain \n as paragraph break
+             else:
+                 new_text.append(line.strip())
+             if ruby and readings is not None:
+                 for surface, reading in ruby_pairs(ruby, line):
+                     readings.setdefault(surface, reading)
+             ruby = None
+        else:
+             ruby = line
+    return "".join(new_text)
+
 
-    make_fn = lambda i: os.path.join(path, f"{name}_{i}{ext}")
+def harvest_furigana(text):
+    ''' (text without furigana, {kanji: reading} from the furigana) '''
+    readings = {}
+    return strip_furigana(text, readings), readings
 
-    for i in range(2, sys.maxsize):
-        uni_fn = make_fn(i)
-        if not os.path.exists(uni_fn):
-            return uni_fn
 
-    return None
-    
-    
 ### end functions ###
 
-temp_text = clipboard.get()
-temp_text = temp_text.replace(" ", "")
-if temp_text != "":
+
+def main():
+    import dialogs
+    import clipboard
+
+    temp_text = clipboard.get()
+    if temp_text.replace(" ", "") != "":
+        try:
+             temp = dialogs.alert("", "Use clipboard?",
+                            "Yes", "No", hide_cancel_button=True)
+        except KeyboardInterrupt :
+             print("user cancelled")
+             sys.exit("user cancelled")
+    else: temp = 0
+
+    if temp != 1:
+    ## select file to read
+        filepath = dialogs.pick_document(types = ["public.utf8-plain-text",
+                                                  "public.text"])
+        if filepath == None:
+            print("user cancelled")
+            sys.exit("user cancelled")
+        with open(filepath, "r", encoding="utf-8") as fp:
+            temp_text = fp.read()
+
+    if temp_text == "":
+        print("file empty")
+        sys.exit()
+    new_text = strip_furigana(temp_text)
+
+    print("\n\n\n")
+    print(new_text)
+    print("\n\n\n")
+
     try:
-         temp = dialogs.alert("", "Use clipboard?", 
-                        "Yes", "No", hide_cancel_button=True)
+        name = dialogs.input_alert("💾 Save...", "Save file as:",
+                               "untitled_noruby", "Save", hide_cancel_button=False)
     except KeyboardInterrupt :
          print("user cancelled")
          sys.exit("user cancelled")
-else: temp = 0
-     
-if temp == 1:
-    temp_text = clipboard.get()
-    temp_path = "_temp.txt"
-    tempfile = open(temp_path, "w", encoding="utf-8")
-    tempfile.write(temp_text)
-    tempfile.close()
-    
-if temp != 1:
-## select file to read
-    filepath = dialogs.pick_document(types = ["public.utf8-plain-text",
-                                              "public.text"])
-    if filepath == None:
-        print("user cancelled")
-        sys.exit("user cancelled")
-else:
-    filepath = temp_path
-      
-new_text = ""
-line_length = []
-# analyse line lengths
-with open(filepath, "r", encoding="utf-8") as fp:
-    for line in fp:
-        line = line.replace(" ", "")
-        line_length.append(len(line.strip()))
-         
-line_length.sort()
-x = int(4 * len(line_length)/5)
-try: top20_lines = line_length[x:]
-except: 
-    print("file empty")
-    sys.exit()
-y = statistics.mode(top20_lines)
-z = 4 # magic number, used to determine lines likely to be paragraph returns. 
-
-with open(filepath, "r", encoding="utf-8") as fp:
-    for line in fp:
-        # line = line.replace(" ", "")
-        # discard furigana
-        if (extract_unicode_block(kanji, line) != [] or 
-            extract_unicode_block(symbols_punct, line) != [] or 
-            len(line.replace(" ", "").strip()) >= y - 2):
-             # if line has kanji or punctuation it is not furigana
-             if  (y - z) >= len(line.strip()) :
-                 new_text = new_text + line  #retain \n as paragraph break 
-             else:
-                 new_text = new_text + line.strip()
-
-print("\n\n\n")
-print(new_text)
-print("\n\n\n")
-
-try:
-    name = dialogs.input_alert("💾 Save...", "Save file as:", 
-                           "untitled_noruby", "Save", hide_cancel_button=False)
-except KeyboardInterrupt :
-     print("user cancelled")
-     sys.exit("user cancelled")
-
-newname = name + ".txt"
-newdir = "removefurigana output/"
-newfile = Path(newdir)
-if not newfile.is_dir(): os.mkdir(newdir)
-newfile = Path(newdir + newname)
-newpath = add_unique_postfix(newfile)
-newfile = open(newpath, "w", encoding="utf-8")
-newfile.write(new_text)
-newfile.close()
-
-
-if temp == 1:
-    if os.path.isfile(temp_path):
-        os.remove(temp_path)
-temp = 0
-try: temp = dialogs.alert("", "📋 Save output text to clipboard ?", 
-                         "Yes", "No", hide_cancel_button=True)
-except KeyboardInterrupt :
-     print("user cancelled")
-     sys.exit("user cancelled")
-     
-if temp == 1:
-    clipboard.set(new_text)
-
-
-    
-      
-        
-          
-            
-              
-                
-                  
-                    
-                      
-                        
-                          
-                            
-                              
-                                
-                                  
-                                    
-                                      
-                                        
-                                          
-                                            
-                                                
+
+    newname = name + ".txt"
+    newdir = "removefurigana output/"
+    newfile = Path(newdir)
+    if not newfile.is_dir(): os.mkdir(newdir)
+    newfile = Path(newdir + newname)
+    newpath = unique_path(newfile)
+    newfile = open(newpath, "w", encoding="utf-8")
+    newfile.write(new_text)
+    newfile.close()
+
+    temp = 0
+    try: temp = dialogs.alert("", "📋 Save output text to clipboard ?",
+                             "Yes", "No", hide_cancel_button=True)
+    except KeyboardInterrupt :
+         print("user cancelled")
+         sys.exit("user cancelled")
+
+    if temp == 1:
+        clipboard.set(new_text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+#   A new install: data/ holds only dict.zip. Unzipping it in the
+#   background, as the gui does, and building the lexicon must not
+#   wait on each other, and a sieve's json must not depend on the
+#   hash seed.
+#   run from the kanji sieve folder:
+#      python -m pytest tests
+
+import os
+import tempfile
+import unittest
+from tinydict import HERE, TEXT, make_zip, run
+
+TIMEOUT = 30  # s, a deadlock shows as a timeout
+
+# the lexicon is the first to want dict.db, as with the lexicon segmenter
+SCRIPT = """
+import sys, ks_data, ks_lexicon
+if sys.argv[1] == "background":
+    ks_data.prepare_dict_db()  # as the gui does while a file is picked
+print(len(ks_lexicon.load()))
+"""
+SEEDS = ("1", "2", "3")
+
+
+class FreshInstallTest(unittest.TestCase):
+
+    def fresh(self, digest=True, start="first use"):
+        with tempfile.TemporaryDirectory() as folder:
+            make_zip(folder, digest)
+            out = run(folder, ["-c", SCRIPT, start], timeout=TIMEOUT)
+            data = os.listdir(os.path.join(folder, "data"))
+        self.assertGreater(int(out), 0)
+        self.assertIn("dict.db", data)
+        self.assertNotIn("dict.zip", data)
+
+    def test_lexicon(self):
+        self.fresh()
+
+    def test_lexicon_background(self):
+        self.fresh(start="background")
+
+    def test_lexicon_without_digest(self):
+        self.fresh(digest=False)
+
+    def test_json_seeds(self):
+        with tempfile.TemporaryDirectory() as folder:
+            make_zip(folder)
+            cli = os.path.join(HERE, "ks_cli.py")
+            outs = [run(folder, [cli, "kanji-sieve", "--json"],
+                        timeout=TIMEOUT, seed=seed, stdin=TEXT)
+                    for seed in SEEDS]
+        self.assertIn('"term_info"', outs[0])
+        for seed, out in zip(SEEDS[1:], outs[1:]):
+            self.assertEqual(out, outs[0], "PYTHONHASHSEED=" + seed)
+
+
+if __name__ == '__main__':
+    unittest.main()
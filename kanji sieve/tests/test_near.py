@@ -0,0 +1,95 @@
+#   Near matches stay fast when some bigrams are in most terms (る$,
+#   ^お), and a near.ksn that is not one, or is cut short, says so.
+#   run from the kanji sieve folder:
+#      python -m pytest tests
+
+import os
+import sys
+import time
+import random
+import tempfile
+import unittest
+from tinydict import HERE
+
+sys.path.insert(0, HERE)
+import ks_near  # noqa: E402
+
+BUDGET_MS = 300  # suggestions for WORDS orphans, best of RUNS
+RUNS = 3
+TERMS = 100000
+WORDS = 300
+
+
+class Lexicon(object):
+    ''' the one part of a ks_lexicon.Lexicon the index reads '''
+
+    def __init__(self, terms):
+        self.terms = terms
+
+
+def _terms(rnd):
+    ''' kanji words, half of them verbs in る, a third polite in お '''
+    kanji = [chr(c) for c in range(0x4e00, 0x4e00 + 3000)]
+    terms = []
+    for i in range(TERMS):
+        term = "".join(rnd.choice(kanji) for j in range(rnd.randint(1, 3)))
+        if i % 2:
+            term += "る"
+        if i % 3 == 0:
+            term = "お" + term
+        terms.append(term)
+    return list(dict.fromkeys(terms)), kanji
+
+
+class NearTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, "near.ksn")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_common_bigrams(self):
+        rnd = random.Random(0)
+        terms, kanji = _terms(rnd)
+        misread = {}
+        for term in rnd.sample(terms, WORDS):
+            i = rnd.randrange(len(term))
+            misread[term[:i] + rnd.choice(kanji) + term[i + 1:]] = term
+        index = ks_near.NearIndex(Lexicon(terms), self.path)
+        ms = float("inf")
+        for i in range(RUNS):
+            start = time.perf_counter()
+            near = index.suggest_all(misread)
+            ms = min(ms, (time.perf_counter() - start) * 1000)
+        index.close()
+        self.assertLess(ms, BUDGET_MS,
+                        f"{WORDS} orphans took {ms:.1f} ms")
+        # a misread one kanji word has no bigram left to be found by, and
+        # some words have more than SUGGESTIONS terms as near
+        found = sum(term in near.get(word, ())
+                    for word, term in misread.items())
+        self.assertGreater(found, WORDS // 2)
+
+    def test_foreign_file(self):
+        with open(self.path, "wb") as f:
+            f.write(b"KSK1" + bytes(64))
+        with self.assertRaisesRegex(ValueError, "not a near index"):
+            ks_near.NearIndex(Lexicon(["学校"]), self.path)
+
+    def test_cut_short(self):
+        ks_near.build(["学校", "先生", "友達"], self.path)
+        with open(self.path, "r+b") as f:
+            f.truncate(20)
+        with self.assertRaisesRegex(ValueError, "cut short"):
+            ks_near.NearIndex(Lexicon(["学校", "先生", "友達"]), self.path)
+
+    def test_empty_file(self):
+        open(self.path, "wb").close()
+        with self.assertRaisesRegex(ValueError, "not a near index"):
+            ks_near.NearIndex(Lexicon(["学校"]), self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
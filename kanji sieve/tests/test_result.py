@@ -0,0 +1,42 @@
+#   Merged results: sieving a text in parts and merging the parts'
+#   SieveResults renders the report a single sieve of the text does,
+#   source text and difficulty window included.
+#   run from the kanji sieve folder:
+#      python -m pytest tests
+
+import json
+import tempfile
+import unittest
+from tinydict import TEXT, make_data, run
+
+SCRIPT = """
+import json, sys
+from ks_engine import DEFAULT_PREFS, render_md, sieve_text
+from ks_result import SieveResult, merge_all
+prefs = dict(DEFAULT_PREFS, window="20", corpus="0", kanjidic="0",
+             near="0")
+text = sys.stdin.read()
+lines = text.splitlines(keepends=True)
+shards = [SieveResult.from_result(sieve_text(line, prefs), prefs)
+          for line in lines]
+shards = [SieveResult.loads(s.dumps()) for s in shards]
+merged = merge_all(shards).to_result("text", prefs=prefs)
+whole = sieve_text(text, prefs, name="text")
+print(json.dumps([render_md(whole, prefs), render_md(merged, prefs)]))
+"""
+
+
+class MergeTest(unittest.TestCase):
+
+    def test_merged_report(self):
+        with tempfile.TemporaryDirectory() as folder:
+            make_data(folder)
+            whole, merged = json.loads(run(folder, ["-c", SCRIPT],
+                                           stdin=TEXT))
+        self.assertIn("known tokens per 20 characters", whole)
+        self.assertIn(TEXT.splitlines()[0], merged)
+        self.assertEqual(merged, whole)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+#   Startup budget: importing ks_engine has to stay cheap, so the
+#   sieve (and every tool built on it) opens quickly.
+#   run from the kanji sieve folder:
+#      python -m pytest tests
+#   or python -m unittest discover tests
+
+import os
+import sys
+import subprocess
+import unittest
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BUDGET_MS = 150  # cumulative import time of ks_engine, best of RUNS
+RUNS = 3
+# loaded on first use, never at import
+DEFERRED = ("markdown2", "zipfile", "csv", "ui", "dialogs", "webbrowser",
+            "tinysegmenter")
+
+
+def _import_ms():
+    ''' ks_engine's cumulative import time in a fresh interpreter '''
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c",
+                          "import ks_engine"],
+                         cwd=HERE, capture_output=True, text=True,
+                         check=True).stderr
+    for line in out.splitlines():
+        # import time: self [us] | cumulative | imported package
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == "ks_engine":
+            return int(fields[1]) / 1000
+    raise AssertionError("ks_engine not in the import times:\n" + out)
+
+
+class StartupTest(unittest.TestCase):
+
+    def test_import_time(self):
+        ms = min(_import_ms() for i in range(RUNS))
+        self.assertLess(ms, BUDGET_MS,
+                        f"importing ks_engine took {ms:.1f} ms")
+
+    def test_deferred_modules(self):
+        out = subprocess.run(
+            [sys.executable, "-c",
+             "import sys, ks_engine\n"
+             f"print(' '.join(m for m in {DEFERRED!r} if m in sys.modules))"],
+            cwd=HERE, capture_output=True, text=True, check=True).stdout
+        self.assertEqual(out.split(), [],
+                         "imported by ks_engine at startup")
+
+
+if __name__ == '__main__':
+    unittest.main()
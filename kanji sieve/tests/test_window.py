@@ -0,0 +1,52 @@
+#   Which tokens the difficulty window counts as known: tokens are
+#   compared substituted, as the word lists have them, kana words the
+#   sieve lists are judged like kanji words, other kana are known.
+#   run from the kanji sieve folder:
+#      python -m pytest tests
+
+import os
+import json
+import tempfile
+import unittest
+from tinydict import run
+
+SCRIPT = """
+import json, sys
+from ks_window import known_test
+result = {"omitted": ["来る"], "kana_words": ["ござい", "ありがとう"],
+          "known": ["ありがとう"]}
+is_known = known_test(result, json.loads(sys.argv[1]))
+print(json.dumps({t: is_known(t) for t in sys.argv[2:]}))
+"""
+TOKENS = ["来", "の", "ござい", "ありがとう", "学校", "誕生", "々"]
+
+
+class KnownTest(unittest.TestCase):
+
+    def known(self, prefs):
+        with tempfile.TemporaryDirectory() as folder:
+            os.mkdir(os.path.join(folder, "data"))
+            with open(os.path.join(folder, "data", "sub.ksv"), "w",
+                      encoding="utf-8") as f:
+                f.write("来,来る\n")
+            return json.loads(run(folder, ["-c", SCRIPT, json.dumps(prefs)]
+                                  + TOKENS))
+
+    def test_default_grade(self):
+        self.assertEqual(self.known({}), {
+            "来": True,            # substituted, then omitted
+            "の": True,            # a particle
+            "ござい": False,       # a listed kana word
+            "ありがとう": True,    # known to the reader profile
+            "学校": True,          # grade 1 kanji
+            "誕生": True,          # grade 6
+            "々": False})          # past the kyouiku lists
+
+    def test_known_grade(self):
+        known = self.known({"known_grade": "1"})
+        self.assertTrue(known["学校"])
+        self.assertFalse(known["誕生"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+#   A dictionary small enough to write for each test: data/dict.db
+#   with a few rows in each table, or the data/dict.zip a new install
+#   has, and the script runner the tests share, as the sieve reads
+#   its data from the working folder.
+
+import os
+import sys
+import sqlite3
+import subprocess
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCHEMA = """
+CREATE TABLE core(kanji text, kana text, pos text, eng text);
+CREATE TABLE user(kanji text, kana text, eng text, pos text, jp text);
+CREATE TABLE words_jp(ID integer, kanji text, reading text, tags text);
+CREATE TABLE words_en(JPID integer, def text);
+CREATE INDEX core_k on core(kanji);
+CREATE INDEX wjp_k on words_jp(kanji);
+CREATE INDEX wjp_r on words_jp(reading);
+CREATE INDEX wen on words_en(JPID);
+"""
+CORE = [("学校", "がっこう", "n", "school"), ("先生", "せんせい", "n", "teacher"),
+        ("友達", "ともだち", "n", "friend")]
+USER = [("誕生", "たんじょう", "birth", "n", "うまれること")]
+JMDICT = [(1, "今日", "きょう", "n", "today"),
+          (2, "天気", "てんき", "n", "weather"),
+          (3, "公園", "こうえん", "n", "park"),
+          (4, "散歩", "さんぽ", "n,vs", "walk, stroll"),
+          (5, "猫", "ねこ", "n", "cat")]
+
+TEXT = ("今日は天気がいいので、友達と公園へ散歩に行った。\n"
+        "学校の先生も来ました。猫がいます。\n"
+        "誕生日おめでとう。今日も学校です。\n")
+
+
+def make_db(path):
+    con = sqlite3.connect(path)
+    con.executescript(SCHEMA)
+    con.executemany("INSERT INTO core VALUES(?, ?, ?, ?)", CORE)
+    con.executemany("INSERT INTO user VALUES(?, ?, ?, ?, ?)", USER)
+    con.executemany("INSERT INTO words_jp VALUES(?, ?, ?, ?)",
+                    [row[:4] for row in JMDICT])
+    con.executemany("INSERT INTO words_en VALUES(?, ?)",
+                    [(row[0], row[4]) for row in JMDICT])
+    con.commit()
+    con.close()
+    return path
+
+
+def make_data(folder):
+    ''' folder/data/dict.db, the folder to run the sieve in '''
+    os.makedirs(os.path.join(folder, "data"), exist_ok=True)
+    return make_db(os.path.join(folder, "data", "dict.db"))
+
+
+def make_zip(folder, digest=True):
+    ''' folder/data/dict.zip, and dict.sha256 beside it, as installed '''
+    import hashlib
+    import zipfile
+    data = os.path.join(folder, "data")
+    os.makedirs(data, exist_ok=True)
+    db = make_db(os.path.join(folder, "dict.db"))
+    with zipfile.ZipFile(os.path.join(data, "dict.zip"), "w",
+                         zipfile.ZIP_DEFLATED) as zip:
+        zip.write(db, "dict.db")
+    if digest:
+        with open(db, "rb") as f:
+            sha = hashlib.sha256(f.read()).hexdigest()
+        with open(os.path.join(data, "dict.sha256"), "w") as f:
+            f.write(sha + "  dict.db\n")
+    os.remove(db)
+    return os.path.join(data, "dict.zip")
+
+
+def run(folder, args, timeout=60, seed="0", stdin=None):
+    ''' python args in folder, with the kanji sieve modules importable '''
+    env = dict(os.environ, PYTHONPATH=HERE, PYTHONHASHSEED=seed)
+    return subprocess.run([sys.executable] + list(args), cwd=folder,
+                          env=env, input=stdin, capture_output=True,
+                          text=True, timeout=timeout, check=True).stdout